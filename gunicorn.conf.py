@@ -0,0 +1,39 @@
+"""Gunicorn settings, sized from the environment.
+
+SERVER_INTERFACE=asgi serves myproject.asgi with uvicorn workers. Async
+views such as the stock lookups then wait on the database without holding a
+thread. Sync views still work, but Django runs them one at a time per worker
+on a single thread. Keep WSGI unless polling traffic dominates.
+
+WEB_CONCURRENCY sets the number of worker processes. It defaults to
+2 x CPUs + 1. GUNICORN_THREADS sets the threads per worker; above 1,
+workers use the gthread class. With DATABASE_POOL enabled, each worker
+process holds one psycopg pool. Keep DATABASE_POOL_MAX_SIZE at or above
+GUNICORN_THREADS (it defaults to it) and
+WEB_CONCURRENCY x DATABASE_POOL_MAX_SIZE below the server's max_connections.
+"""
+
+import multiprocessing
+import os
+
+asgi = os.getenv('SERVER_INTERFACE', 'wsgi').lower() == 'asgi'
+
+wsgi_app = 'myproject.asgi:application' if asgi else 'myproject.wsgi:application'
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+if asgi:
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers now and then so slow leaks cannot accumulate; the jitter
+# keeps them from all restarting at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = '-'
+errorlog = '-'
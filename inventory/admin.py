@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Category, Product, Sale, Supplier
+from .models import (
+    Category,
+    Product,
+    PurchaseOrder,
+    PurchaseOrderLine,
+    Sale,
+    StockAlert,
+    StockMovement,
+    StockSnapshot,
+    Supplier,
+)
 
 
 @admin.register(Category)
@@ -28,3 +38,48 @@ class SaleAdmin(admin.ModelAdmin):
     list_display = ('product', 'quantity', 'unit_price', 'sold_by', 'created_at')
     list_filter = ('product', 'sold_by')
     search_fields = ('product__name', 'sold_by__username')
+
+
+class PurchaseOrderLineInline(admin.TabularInline):
+    model = PurchaseOrderLine
+    raw_id_fields = ('product',)
+    extra = 0
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'supplier', 'status', 'created_at', 'received_at')
+    list_filter = ('status', 'supplier')
+    search_fields = ('reference', 'supplier__name')
+    # Receiving goes through the purchase order views so stock moves with it.
+    readonly_fields = ('status', 'received_at', 'received_by', 'created_by')
+    inlines = [PurchaseOrderLineInline]
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = ('product', 'quantity', 'reorder_level', 'created_at', 'processed_at', 'attempts')
+    list_filter = ('processed_at',)
+    search_fields = ('product__name', 'product__sku')
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('product', 'kind', 'quantity', 'sale', 'created_by', 'note', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('product__name', 'product__sku', 'note')
+    raw_id_fields = ('product', 'sale', 'purchase_order', 'created_by')
+
+    # The ledger is append-only; corrections are new adjustments.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('product', 'taken_at', 'quantity')
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('product',)
@@ -0,0 +1,138 @@
+"""Low-stock alerting: outbox writes on the stock paths, notifiers for the worker.
+
+Stock-changing code calls :func:`record_crossings` inside its own
+transaction, so an alert exists exactly when the stock change commits. The
+``process_stock_alerts`` command drains the outbox in batches and hands each
+batch to the notifiers listed in ``settings.STOCK_ALERT_NOTIFIERS``.
+"""
+
+import json
+import logging
+import urllib.request
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from accounts.models import User
+from .models import StockAlert
+
+logger = logging.getLogger(__name__)
+
+
+def record_crossings(changes, *, using=None):
+    """Write alerts for ``(product, was_low_stock)`` pairs that crossed the threshold.
+
+    ``product`` carries the new ``quantity`` and ``reorder_level``; a lowered
+    quantity and a raised reorder level both count.
+    """
+    alerts = [
+        StockAlert(product_id=product.pk, quantity=product.quantity, reorder_level=product.reorder_level)
+        for product, was_low_stock in changes
+        if product.is_low_stock and not was_low_stock
+    ]
+    if alerts:
+        StockAlert.objects.using(using).bulk_create(alerts)
+
+
+def get_notifiers():
+    return [import_string(path)() for path in settings.STOCK_ALERT_NOTIFIERS]
+
+
+def describe(alert):
+    return {
+        'product_id': alert.product_id,
+        'sku': alert.product.sku,
+        'name': alert.product.name,
+        'quantity': alert.quantity,
+        'reorder_level': alert.reorder_level,
+        'detected_at': alert.created_at.isoformat(),
+    }
+
+
+class EmailNotifier:
+    """One digest email per batch to STOCK_ALERT_EMAILS, or to every manager."""
+
+    def recipients(self):
+        if settings.STOCK_ALERT_EMAILS:
+            return list(settings.STOCK_ALERT_EMAILS)
+        return list(
+            User.objects.filter(role=User.Roles.MANAGER, is_active=True)
+            .exclude(email='')
+            .values_list('email', flat=True)
+        )
+
+    def send(self, alerts):
+        recipients = self.recipients()
+        if not recipients:
+            return
+        lines = [
+            f"{item['name']} ({item['sku']}): {item['quantity']} left, reorder level {item['reorder_level']}"
+            for item in map(describe, alerts)
+        ]
+        send_mail(
+            f'Low stock: {len(alerts)} product(s) at or below reorder level',
+            '\n'.join(lines),
+            None,
+            recipients,
+        )
+
+
+class WebhookNotifier:
+    """POST the batch as JSON to STOCK_ALERT_WEBHOOK_URL."""
+
+    timeout = 10
+
+    def send(self, alerts):
+        url = settings.STOCK_ALERT_WEBHOOK_URL
+        if not url:
+            return
+        body = json.dumps({'alerts': [describe(alert) for alert in alerts]}).encode()
+        request = urllib.request.Request(
+            url, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class MemoryNotifier:
+    """Local stand-in that keeps every delivered batch in ``MemoryNotifier.batches``."""
+
+    batches = []
+
+    def send(self, alerts):
+        self.batches.append([describe(alert) for alert in alerts])
+
+
+def process_pending_alerts(batch_size=100, max_attempts=5, notifiers=None):
+    """Deliver one batch of pending alerts; returns how many were delivered.
+
+    Rows are claimed with ``SKIP LOCKED`` so several workers can drain the
+    outbox side by side. A failed delivery leaves the batch pending for a
+    later attempt, up to ``max_attempts``.
+    """
+    notifiers = get_notifiers() if notifiers is None else notifiers
+    with transaction.atomic():
+        alerts = list(
+            StockAlert.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('product')
+            .filter(processed_at__isnull=True, attempts__lt=max_attempts)
+            .order_by('created_at')[:batch_size]
+        )
+        if not alerts:
+            return 0
+        ids = [alert.pk for alert in alerts]
+        try:
+            for notifier in notifiers:
+                notifier.send(alerts)
+        except Exception:
+            logger.exception('Delivering %d stock alerts failed.', len(alerts))
+            StockAlert.objects.filter(pk__in=ids).update(attempts=F('attempts') + 1)
+            return 0
+        StockAlert.objects.filter(pk__in=ids).update(
+            processed_at=timezone.now(), attempts=F('attempts') + 1
+        )
+    return len(alerts)
@@ -1,17 +1,64 @@
-from rest_framework import permissions, serializers, viewsets
+from collections import defaultdict
+from datetime import datetime, time
+from functools import partial
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
 from accounts.models import User
-from .models import Category, Product, Sale, Supplier
+from .alerts import record_crossings
+from .conditional import collection_validators, conditional_response, instance_validators
+from .forecasting import STOCKOUT_FORECAST_SIZE, cached_stockout_forecast
+from .idempotency import HEADER, MAX_KEY_LENGTH, IdempotencyKeyReused, fingerprint, request_key, run_once
+from .importing import ImportFormatError, ProductImporter, read_rows
+from .ledger import stock_as_of
+from .models import Category, Product, PurchaseOrder, PurchaseOrderLine, Sale, Supplier
+from .pagination import SearchResultsPagination
+from .search import search_products
+from .stock import PurchaseOrderNotOpen, receive_purchase_order, record_sales_bulk
+from .sync import ExpiredToken, InvalidToken, changes_since
 
+MAX_BULK_SALES = 1000
+MAX_SYNC_CHANGES = 5000
 
-class CategorySerializer(serializers.ModelSerializer):
+
+def requested_fields(request):
+    """Return the set of fields named in ``?fields=``, or None for all of them."""
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """Limit serializer output to the fields requested with ``?fields=``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get("request"))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Category
         fields = ["id", "name", "description", "created_at", "updated_at"]
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Supplier
@@ -28,7 +75,7 @@ class SupplierSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     category_name = serializers.CharField(source="category.name", read_only=True)
     supplier_name = serializers.CharField(source="supplier.name", read_only=True)
@@ -55,7 +102,7 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
 
-class SaleSerializer(serializers.ModelSerializer):
+class SaleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     sold_by = serializers.PrimaryKeyRelatedField(read_only=True)
     sold_by_username = serializers.CharField(source="sold_by.username", read_only=True)
@@ -81,33 +128,411 @@ class SaleSerializer(serializers.ModelSerializer):
         validated_data["sold_by"] = request.user
         return super().create(validated_data)
 
+    def validate_product(self, product):
+        # Existing sales of a since-retired product stay editable.
+        if not product.is_active and (self.instance is None or self.instance.product_id != product.pk):
+            raise serializers.ValidationError("Product is not active.")
+        return product
+
+    def save(self, **kwargs):
+        # Sale.save re-checks stock under the row lock; losing that race is
+        # a client error like any other failed validation.
+        try:
+            return super().save(**kwargs)
+        except DjangoValidationError as exc:
+            errors = exc.message_dict if hasattr(exc, "error_dict") else {NON_FIELD_ERRORS: exc.messages}
+            raise serializers.ValidationError(
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY if field == NON_FIELD_ERRORS else field: messages
+                    for field, messages in errors.items()
+                }
+            )
+
+
+class BulkSaleItemSerializer(serializers.ModelSerializer):
+
+    # A plain id; products are resolved once for the whole batch.
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Sale
+        fields = ["product", "quantity", "unit_price", "notes"]
+
+
+class PurchaseOrderLineSerializer(serializers.ModelSerializer):
+
+    # A plain id; the products of a whole order are checked in one query.
+    product = serializers.IntegerField(source="product_id", min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = PurchaseOrderLine
+        fields = ["product", "quantity", "unit_cost"]
+
+
+class PurchaseOrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+
+    supplier_name = serializers.CharField(source="supplier.name", read_only=True)
+    lines = PurchaseOrderLineSerializer(many=True)
+
+    class Meta:
+        model = PurchaseOrder
+        fields = [
+            "id",
+            "supplier",
+            "supplier_name",
+            "reference",
+            "status",
+            "notes",
+            "lines",
+            "created_by",
+            "received_at",
+            "received_by",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["status", "created_by", "received_at", "received_by"]
+
+    def validate_lines(self, lines):
+        if not lines:
+            raise serializers.ValidationError("An order needs at least one line.")
+        if len(lines) > PurchaseOrder.MAX_LINES:
+            raise serializers.ValidationError(f"At most {PurchaseOrder.MAX_LINES} lines per order.")
+        product_ids = [line["product_id"] for line in lines]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product may appear once per order.")
+        missing = set(product_ids) - set(Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True))
+        if missing:
+            raise serializers.ValidationError(f"Unknown products: {sorted(missing)[:10]}.")
+        return lines
+
+    def validate(self, attrs):
+        if self.instance is not None and not self.instance.is_open:
+            raise serializers.ValidationError("Received orders cannot be changed.")
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        lines = validated_data.pop("lines")
+        validated_data["created_by"] = self.context["request"].user
+        order = super().create(validated_data)
+        PurchaseOrderLine.objects.bulk_create(PurchaseOrderLine(order=order, **line) for line in lines)
+        return order
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        lines = validated_data.pop("lines", None)
+        order = super().update(instance, validated_data)
+        if lines is not None:
+            order.lines.all().delete()
+            PurchaseOrderLine.objects.bulk_create(PurchaseOrderLine(order=order, **line) for line in lines)
+        return order
+
+
+class IsManager(permissions.BasePermission):
+
+    message = "You need manager access to perform this action."
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user.is_authenticated and (user.is_superuser or user.is_manager()))
+
 
 class BaseViewSet(viewsets.ModelViewSet):
 
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cursor_ordering = ("name", "id")
+    # Serializer field -> relation to join only when that field is returned.
+    related_fields = {}
+    # Wide text columns left unloaded unless explicitly requested.
+    deferrable_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        requested = requested_fields(self.request)
+        relations = [
+            relation
+            for field, relation in self.related_fields.items()
+            if requested is None or field in requested
+        ]
+        if relations:
+            queryset = queryset.select_related(*relations)
+        if requested is not None:
+            deferred = [field for field in self.deferrable_fields if field not in requested]
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
 
 
-class CategoryViewSet(BaseViewSet):
+class ConditionalGetMixin:
+    """Answer unchanged ``list`` and ``retrieve`` requests with 304 before serializing.
+
+    ``validator_dependencies`` are the models whose names the serializer
+    copies into each row, so renaming one changes the tag too.
+    """
+
+    validator_dependencies = ()
+
+    def validator_variant(self):
+        return (self.request.get_full_path(), self.request.accepted_renderer.format)
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = collection_validators(
+            self.filter_queryset(self.get_queryset()),
+            self.validator_dependencies,
+            self.validator_variant(),
+        )
+        render = partial(super().list, request, *args, **kwargs)
+        return conditional_response(request, etag, last_modified, render, vary=("Cookie", "Authorization"))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = instance_validators(
+            instance, self.validator_dependencies, self.validator_variant()
+        )
+
+        def render():
+            return Response(self.get_serializer(instance).data)
+
+        return conditional_response(request, etag, last_modified, render, vary=("Cookie", "Authorization"))
+
+
+class CategoryViewSet(ConditionalGetMixin, BaseViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    deferrable_fields = ("description",)
 
 
-class SupplierViewSet(BaseViewSet):
+class SupplierViewSet(ConditionalGetMixin, BaseViewSet):
 
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
+    deferrable_fields = ("address",)
 
 
-class ProductViewSet(BaseViewSet):
+class ProductViewSet(ConditionalGetMixin, BaseViewSet):
 
-    queryset = Product.objects.select_related("category", "supplier").all()
+    queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    validator_dependencies = (Category, Supplier)
+    related_fields = {"category_name": "category", "supplier_name": "supplier"}
+    deferrable_fields = ("description",)
+
+    def get_search_term(self):
+        return self.request.query_params.get("search", "").strip()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        term = self.get_search_term()
+        if term and self.action == "list":
+            queryset = search_products(queryset, term)
+        return queryset
+
+    def perform_update(self, serializer):
+        was_low_stock = serializer.instance.is_low_stock
+        with transaction.atomic():
+            record_crossings([(serializer.save(), was_low_stock)])
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+        permission_classes=[IsManager],
+    )
+    def import_products(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise serializers.ValidationError({"file": "Upload a CSV or XLSX file."})
+        try:
+            report = ProductImporter().run(read_rows(upload, upload.name))
+        except ImportFormatError as exc:
+            raise serializers.ValidationError({"file": str(exc)})
+        return Response(report.as_dict())
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="reorder-suggestions",
+        permission_classes=[IsManager],
+    )
+    def reorder_suggestions(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 50)), STOCKOUT_FORECAST_SIZE)
+        except ValueError:
+            raise serializers.ValidationError({"limit": "A whole number is required."})
+        # Served from the shared forecast cache; a full pass takes seconds.
+        return Response(cached_stockout_forecast(max(limit, 1)))
+
+    @action(detail=True, methods=["get"], url_path="stock")
+    def stock(self, request, pk=None):
+        """Stock on hand at ``?as_of=`` (a date means the close of that day)."""
+        product = self.get_object()
+        value = request.query_params.get("as_of", "").strip()
+        try:
+            if not value:
+                when = timezone.now()
+            elif day := parse_date(value):
+                when = timezone.make_aware(datetime.combine(day, time.max))
+            else:
+                when = serializers.DateTimeField().to_internal_value(value)
+        except (ValueError, serializers.ValidationError):
+            raise serializers.ValidationError({"as_of": "Use an ISO 8601 date or datetime."})
+        return Response({"product": product.pk, "as_of": when, "quantity": stock_as_of(product.pk, when)})
+
+    @property
+    def paginator(self):
+        # Cursor pagination would impose (name, id) order over the ranking.
+        if not hasattr(self, "_paginator") and self.get_search_term():
+            self._paginator = SearchResultsPagination()
+        return super().paginator
 
 
 class SaleViewSet(BaseViewSet):
 
-    queryset = Sale.objects.select_related("product", "sold_by").all()
+    queryset = Sale.objects.all()
     serializer_class = SaleSerializer
+    cursor_ordering = ("-created_at", "-id")
+    related_fields = {"sold_by_username": "sold_by"}
+    deferrable_fields = ("notes",)
+
+    def idempotent(self, scope, handler):
+        """Run ``handler`` at most once per ``Idempotency-Key``; retries get the stored response."""
+        key = request_key(self.request)
+        if not key:
+            return handler()
+        if len(key) > MAX_KEY_LENGTH:
+            raise serializers.ValidationError({"detail": f"{HEADER} is limited to {MAX_KEY_LENGTH} characters."})
+        try:
+            return run_once(
+                self.request.user,
+                scope,
+                key,
+                fingerprint(self.request.data),
+                handler,
+                serialize=lambda response: response.data if response.status_code < 300 else None,
+                replay=lambda record: Response(
+                    record.response, status=record.status_code, headers={"Idempotent-Replayed": "true"}
+                ),
+            )
+        except IdempotencyKeyReused as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def create(self, request, *args, **kwargs):
+        return self.idempotent("api-sale-create", partial(super().create, request, *args, **kwargs))
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        return self.idempotent("api-sale-bulk", partial(self.record_bulk, request))
+
+    def record_bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Expected a non-empty list of sales."]}
+            )
+        if len(items) > MAX_BULK_SALES:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [f"At most {MAX_BULK_SALES} sales per batch."]}
+            )
+
+        errors = {}
+        sales = []
+        indexes = []
+        for index, item in enumerate(items):
+            item_serializer = BulkSaleItemSerializer(data=item)
+            if not item_serializer.is_valid():
+                errors[index] = item_serializer.errors
+                continue
+            data = item_serializer.validated_data
+            sales.append(
+                Sale(
+                    product_id=data["product"],
+                    sold_by=request.user,
+                    quantity=data["quantity"],
+                    unit_price=data["unit_price"],
+                    notes=data.get("notes", ""),
+                )
+            )
+            indexes.append(index)
+
+        created, rejected = record_sales_bulk(sales)
+        for position, message in rejected.items():
+            errors[indexes[position]] = {"non_field_errors": [message]}
+
+        payload = {
+            "created": SaleSerializer(created, many=True).data,
+            "errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+        }
+        return Response(
+            payload,
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class PurchaseOrderViewSet(BaseViewSet):
+
+    queryset = PurchaseOrder.objects.prefetch_related("lines")
+    serializer_class = PurchaseOrderSerializer
+    permission_classes = [IsManager]
+    cursor_ordering = ("-created_at", "-id")
+    related_fields = {"supplier_name": "supplier"}
+    deferrable_fields = ("notes",)
+
+    def perform_destroy(self, instance):
+        if not instance.is_open:
+            raise serializers.ValidationError("Received orders are part of the stock history.")
+        instance.delete()
+
+    @action(detail=True, methods=["post"])
+    def receive(self, request, pk=None):
+        order = self.get_object()
+        try:
+            order = receive_purchase_order(order.pk, user=request.user)
+        except PurchaseOrderNotOpen as exc:
+            return Response({"detail": exc.messages[0]}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(order).data)
+
+
+class SyncView(APIView):
+    """``GET /api/sync/?since=<token>``: catalog changes since the token.
+
+    Without ``since`` the whole catalog is returned, page by page. Keep
+    requesting with ``next`` while ``has_more`` is true, then store ``next``
+    for the following sync. A 410 means the token expired and the client
+    should drop its copy and sync from scratch.
+    """
 
-
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stream_serializers = {
+        "categories": CategorySerializer,
+        "suppliers": SupplierSerializer,
+        "products": ProductSerializer,
+    }
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 500)), MAX_SYNC_CHANGES)
+        except ValueError:
+            raise serializers.ValidationError({"limit": "A whole number is required."})
+        try:
+            changes, token, has_more = changes_since(request.query_params.get("since") or None, max(limit, 1))
+        except InvalidToken as exc:
+            raise serializers.ValidationError({"since": str(exc)})
+        except ExpiredToken as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_410_GONE)
+
+        grouped = defaultdict(list)
+        for stream, row in changes:
+            grouped[stream].append(row)
+        payload = {
+            # No request in the context: ?fields= does not apply to sync.
+            name: serializer(grouped[name], many=True, context={}).data
+            for name, serializer in self.stream_serializers.items()
+        }
+        payload["deleted"] = [{"type": row.kind, "id": row.object_id} for row in grouped["deleted"]]
+        payload["next"] = token
+        payload["has_more"] = has_more
+        return Response(payload)
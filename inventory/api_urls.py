@@ -3,11 +3,14 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from . import async_api
 from .api import (
     CategoryViewSet,
     ProductViewSet,
+    PurchaseOrderViewSet,
     SaleViewSet,
     SupplierViewSet,
+    SyncView,
 )
 
 router = routers.DefaultRouter()
@@ -15,8 +18,12 @@ router.register("categories", CategoryViewSet, basename="api-category")
 router.register("suppliers", SupplierViewSet, basename="api-supplier")
 router.register("products", ProductViewSet, basename="api-product")
 router.register("sales", SaleViewSet, basename="api-sale")
+router.register("purchase-orders", PurchaseOrderViewSet, basename="api-purchase-order")
 
 urlpatterns = [
+    path("sync/", SyncView.as_view(), name="api-sync"),
+    path("stock/", async_api.stock_levels, name="api-stock-batch"),
+    path("stock/<str:sku>/", async_api.stock_level, name="api-stock"),
     path("", include(router.urls)),
 ]
 
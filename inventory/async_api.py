@@ -0,0 +1,66 @@
+"""Async stock lookups for point-of-sale polling.
+
+These views use Django's async ORM directly and build JSON by hand. They
+skip DRF's request parsing, content negotiation and serializers, which
+dominate the cost of a one-row read. Served under ASGI, a poll waiting on
+the database does not hold a worker thread. Like the rest of the API
+(``IsAuthenticatedOrReadOnly``), reads need no login.
+"""
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import Product
+
+MAX_BATCH_SKUS = 200
+STOCK_FIELDS = ('sku', 'name', 'quantity', 'reorder_level', 'is_active', 'updated_at')
+
+
+def stock_payload(row):
+    return {
+        'sku': row['sku'],
+        'name': row['name'],
+        'quantity': row['quantity'],
+        'reorder_level': row['reorder_level'],
+        'is_low_stock': row['quantity'] <= row['reorder_level'],
+        'is_active': row['is_active'],
+        'updated_at': row['updated_at'].isoformat(),
+    }
+
+
+def error(detail, status):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+@require_GET
+async def stock_level(request, sku):
+    """``GET /api/stock/<sku>/``: current stock for one SKU."""
+    row = await Product.objects.filter(sku=sku).values(*STOCK_FIELDS).afirst()
+    if row is None:
+        return error('No product with that SKU.', 404)
+    return JsonResponse(stock_payload(row))
+
+
+@require_GET
+async def stock_levels(request):
+    """``GET /api/stock/?sku=A&sku=B`` (or ``?skus=A,B``): stock for several SKUs at once.
+
+    Unknown SKUs are listed under ``missing`` rather than failing the batch.
+    """
+    skus = request.GET.getlist('sku')
+    for value in request.GET.getlist('skus'):
+        skus.extend(sku for sku in value.split(',') if sku)
+    skus = list(dict.fromkeys(sku.strip() for sku in skus if sku.strip()))
+    if len(skus) > MAX_BATCH_SKUS:
+        return error(f'At most {MAX_BATCH_SKUS} SKUs per request.', 400)
+
+    results = []
+    if skus:
+        results = [
+            stock_payload(row)
+            async for row in Product.objects.filter(sku__in=skus).order_by().values(*STOCK_FIELDS)
+        ]
+    found = {row['sku'] for row in results}
+    return JsonResponse(
+        {'results': results, 'missing': [sku for sku in skus if sku not in found]}
+    )
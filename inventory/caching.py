@@ -0,0 +1,64 @@
+"""Versioned caching for dashboard widgets.
+
+Every cached widget key embeds a global data version. Writes to products,
+sales and suppliers bump the version (see ``inventory.signals``), which
+orphans every widget at once; orphaned keys simply expire.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'inventory:data-version'
+
+
+def data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an old version.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Invalidate every cached widget once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def cached_widget(name, compute, timeout=None):
+    """Return the cached value of widget ``name``, computing it on a miss.
+
+    ``compute`` must return something picklable, so evaluate querysets.
+    """
+    if timeout is None:
+        timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    key = f'inventory:widget:{name}:{data_version()}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def rows_fragment_key(rows, stamp):
+    """Digest identifying a rendered table fragment for ``rows``.
+
+    ``stamp`` maps a row to the values its markup depends on, typically ids
+    and ``updated_at`` of the row and of anything joined into it. Any edit,
+    insert or delete that changes what is shown yields a new key.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(repr(stamp(row)).encode())
+    return digest.hexdigest()
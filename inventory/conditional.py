@@ -0,0 +1,76 @@
+"""Conditional GET for catalog reads, decided before anything is rendered.
+
+Validators come from a few index-backed aggregates: the row count and newest
+``updated_at`` of the requested rows, plus the newest ``updated_at`` of
+related tables whose names appear in the output. Deletes change the count
+and leave a :class:`~inventory.models.Tombstone`. So an unchanged list or
+detail is answered with ``304 Not Modified`` without serializing or
+rendering it.
+
+``Last-Modified`` has one-second resolution, so clients should prefer the
+``ETag``; Django ignores ``If-Modified-Since`` whenever ``If-None-Match``
+is sent.
+"""
+
+import hashlib
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Tombstone
+
+
+def _latest(*timestamps):
+    return max((timestamp for timestamp in timestamps if timestamp is not None), default=None)
+
+
+def _etag(parts):
+    return '"%s"' % hashlib.md5(':'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+
+
+def dependency_stamps(models):
+    return [model.objects.aggregate(latest=Max('updated_at'))['latest'] for model in models]
+
+
+def collection_validators(queryset, dependencies=(), variant=()):
+    """Return ``(etag, last_modified)`` for the rows of ``queryset``.
+
+    ``variant`` holds whatever else shapes the response, such as the full
+    path or the renderer, so different representations get different tags.
+    """
+    model = queryset.model
+    queryset = queryset.order_by()
+    # Separate queries: alone, MAX can read the end of the updated_at index,
+    # while combined with COUNT it scans every row.
+    count = queryset.count()
+    latest = queryset.aggregate(latest=Max('updated_at'))['latest']
+    deleted = Tombstone.objects.filter(kind=model._meta.model_name).aggregate(latest=Max('deleted_at'))['latest']
+    stamps = dependency_stamps(dependencies)
+    etag = _etag([model._meta.label_lower, count, latest, deleted, *stamps, *variant])
+    return etag, _latest(latest, deleted, *stamps)
+
+
+def instance_validators(instance, dependencies=(), variant=()):
+    stamps = dependency_stamps(dependencies)
+    etag = _etag([instance._meta.label_lower, instance.pk, instance.updated_at, *stamps, *variant])
+    return etag, _latest(instance.updated_at, *stamps)
+
+
+def conditional_response(request, etag, last_modified, render, *, vary=('Cookie',)):
+    """Return 304 if the client's copy matches, otherwise ``render()``; set validators on both."""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+    if response is None:
+        response = render()
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+        # Revalidate every time rather than trusting a heuristic freshness.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, vary)
+    return response
@@ -0,0 +1,246 @@
+"""Live stock and sales events, published after commit and streamed over SSE.
+
+Write paths call :func:`publish_stock` and :func:`publish_sale`. Events go
+to the broker named by ``settings.EVENT_BROKER`` once the surrounding
+transaction commits. ``MemoryBroker`` fans events out to subscribers in
+the same process and is the default. ``RedisBroker`` relays them through
+Redis pub/sub so every web process sees every write.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from itertools import count
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENT_BROKER)()
+    return _broker
+
+
+def publish(kind, data, *, using=None):
+    """Send an event to every subscriber once the current transaction commits."""
+    event = {'event': kind, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(event), using=using)
+
+
+def publish_stock(product, *, using=None):
+    """``product`` needs ``name``, ``sku``, ``quantity`` and ``reorder_level`` loaded."""
+    publish(
+        'stock',
+        {
+            'product_id': product.pk,
+            'name': product.name,
+            'sku': product.sku,
+            'quantity': product.quantity,
+            'reorder_level': product.reorder_level,
+            'is_low_stock': product.quantity <= product.reorder_level,
+        },
+        using=using,
+    )
+
+
+def publish_sale(sale, *, using=None):
+    """Includes the product name when ``sale.product`` is already loaded."""
+    product = sale.product if type(sale).product.is_cached(sale) else None
+    publish(
+        'sale',
+        {
+            'id': sale.pk,
+            'product_id': sale.product_id,
+            'product_name': product.name if product is not None else None,
+            'sold_by_id': sale.sold_by_id,
+            'quantity': sale.quantity,
+            'unit_price': sale.unit_price,
+            'created_at': sale.created_at,
+        },
+        using=using,
+    )
+
+
+class Subscription:
+    """Events buffered for one client; readable from threads or an event loop.
+
+    A client that falls ``maxlen`` events behind loses the oldest ones
+    rather than growing without bound.
+    """
+
+    def __init__(self, broker, maxlen=1000):
+        self.broker = broker
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._waiter = None
+
+    def push(self, event):
+        with self._lock:
+            self._events.append(event)
+            waiter = self._waiter
+        self._ready.set()
+        if waiter is not None:
+            loop, ready = waiter
+            loop.call_soon_threadsafe(ready.set)
+
+    def _drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._ready.clear()
+        return events
+
+    def get(self, timeout):
+        """Block up to ``timeout`` seconds; return the pending events (maybe none)."""
+        self._ready.wait(timeout)
+        return self._drain()
+
+    async def aget(self, timeout):
+        ready = asyncio.Event()
+        with self._lock:
+            waiting = not self._events
+            if waiting:
+                self._waiter = (asyncio.get_running_loop(), ready)
+        if waiting:
+            try:
+                await asyncio.wait_for(ready.wait(), timeout)
+            except TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    self._waiter = None
+        return self._drain()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MemoryBroker:
+    """In-process fan-out. Also the local stand-in for a cross-process broker."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = count(1)
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        event = {**event, 'id': next(self._ids)}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(event)
+
+
+class RedisBroker(MemoryBroker):
+    """Relay events through a Redis channel to every process.
+
+    Each process runs one listener thread, started with its first
+    subscriber, that hands incoming events to the local subscribers.
+    """
+
+    channel = 'inventory:events'
+
+    def __init__(self):
+        super().__init__()
+        import redis
+
+        self.redis = redis.Redis.from_url(settings.REDIS_URL)
+        self._listener = None
+
+    def subscribe(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, daemon=True)
+                    self._listener.start()
+        return super().subscribe()
+
+    def publish(self, event):
+        try:
+            self.redis.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+        except Exception:
+            # Live updates are best effort; the write itself has committed.
+            logger.exception('Publishing an inventory event to Redis failed.')
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.deliver(json.loads(message['data']))
+            except Exception:
+                logger.exception('Inventory event listener lost Redis; reconnecting.')
+                time.sleep(1)
+
+
+def streaming_enabled(request):
+    """Whether this server should hold event streams open for ``request``."""
+    return isinstance(request, ASGIRequest) or settings.EVENT_STREAM_WSGI
+
+
+def format_sse(event):
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+def _stream_intro():
+    # Tell EventSource how soon to reconnect once the stream is recycled.
+    return f'retry: {settings.EVENT_STREAM_RETRY_MS}\n\n'
+
+
+def iter_sse(subscription):
+    """Sync SSE body for WSGI; ends after ``EVENT_STREAM_MAX_SECONDS``."""
+    with subscription:
+        yield _stream_intro()
+        deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            events = subscription.get(settings.EVENT_STREAM_HEARTBEAT)
+            yield ''.join(map(format_sse, events)) or ': keepalive\n\n'
+
+
+async def aiter_sse(subscription):
+    """Async SSE body for ASGI; holds no thread while idle."""
+    try:
+        yield _stream_intro()
+        deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            events = await subscription.aget(settings.EVENT_STREAM_HEARTBEAT)
+            yield ''.join(map(format_sse, events)) or ': keepalive\n\n'
+    finally:
+        subscription.close()
@@ -0,0 +1,244 @@
+"""Reorder suggestions from sales velocity.
+
+Demand history is read from ``DailySalesRollup`` one block of products at a
+time: each block is a single query returning ``(product, day, quantity)``
+rows, which are scattered into a ``products x days`` NumPy matrix. Velocity,
+variability and the suggested reorder level are then computed for the whole
+block with array operations, so the number of queries grows with the number
+of blocks, not the number of products.
+"""
+
+import heapq
+import math
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .alerts import record_crossings
+from .caching import bump_data_version
+from .models import DailySalesRollup, Product
+
+
+@dataclass
+class ReorderSuggestion:
+    product_id: int
+    quantity: int
+    reorder_level: int
+    moving_average: float
+    velocity: float
+    safety_stock: float
+    suggested_reorder_level: int
+    days_until_stockout: float | None
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class ReorderForecaster:
+    """Compute :class:`ReorderSuggestion` rows for every active product.
+
+    ``velocity`` is the exponentially smoothed daily demand; the simple
+    moving average over ``window`` days is reported alongside it. Safety
+    stock covers demand variability over the lead time at ``service_level``.
+    Products with no sales in the history keep their current reorder level.
+    """
+
+    def __init__(
+        self,
+        *,
+        history_days=None,
+        window=None,
+        alpha=None,
+        lead_time_days=None,
+        service_level=None,
+        chunk_size=5000,
+    ):
+        self.history_days = history_days or settings.REORDER_HISTORY_DAYS
+        self.window = min(window or settings.REORDER_WINDOW_DAYS, self.history_days)
+        self.alpha = alpha or settings.REORDER_SMOOTHING_ALPHA
+        self.lead_time_days = lead_time_days or settings.REORDER_LEAD_TIME_DAYS
+        self.service_level = service_level or settings.REORDER_SERVICE_LEVEL
+        self.chunk_size = chunk_size
+        self.end = timezone.localdate()
+        self.start = self.end - timedelta(days=self.history_days - 1)
+
+        # s_T = sum(a * (1 - a)^(T - t) * x_t) + (1 - a)^T * x_0, as one dot product.
+        decay = (1 - self.alpha) ** np.arange(self.history_days - 1, -1, -1)
+        self.weights = self.alpha * decay
+        self.weights[0] = decay[0]
+        self.z = NormalDist().inv_cdf(self.service_level)
+
+    def __iter__(self):
+        products = (
+            Product.objects.filter(is_active=True)
+            .order_by('pk')
+            .values_list('pk', 'quantity', 'reorder_level')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        block = []
+        for row in products:
+            block.append(row)
+            if len(block) == self.chunk_size:
+                yield from self._forecast(block)
+                block = []
+        if block:
+            yield from self._forecast(block)
+
+    def demand_matrix(self, product_ids):
+        """Daily quantities sold, one row per product id (ids ascending)."""
+        ids = np.fromiter(product_ids, dtype=np.int64)
+        demand = np.zeros((len(ids), self.history_days))
+        rows = (
+            DailySalesRollup.objects.filter(
+                product_id__gte=ids[0],
+                product_id__lte=ids[-1],
+                date__gte=self.start,
+                date__lte=self.end,
+            )
+            .values_list('product_id', 'date')
+            .annotate(total=Sum('quantity'))
+            .order_by()
+        )
+        product_col, day_col, quantity_col = [], [], []
+        for product_id, day, total in rows:
+            product_col.append(product_id)
+            day_col.append((day - self.start).days)
+            quantity_col.append(total)
+        if product_col:
+            positions = np.searchsorted(ids, product_col)
+            # Inactive products inside the id range have no row of their own.
+            known = ids[np.minimum(positions, len(ids) - 1)] == product_col
+            demand[positions[known], np.asarray(day_col)[known]] = np.asarray(quantity_col)[known]
+        return demand
+
+    def _forecast(self, block):
+        ids, quantities, levels = zip(*block)
+        demand = self.demand_matrix(ids)
+        recent = demand[:, -self.window:]
+
+        moving_average = recent.mean(axis=1)
+        velocity = demand @ self.weights
+        sigma = recent.std(axis=1, ddof=1) if self.window > 1 else np.zeros(len(ids))
+        safety_stock = self.z * sigma * math.sqrt(self.lead_time_days)
+        suggested = np.ceil(velocity * self.lead_time_days + safety_stock).astype(np.int64)
+        # Without any sales history there is nothing to improve on the manual level.
+        suggested = np.where(demand.any(axis=1), suggested, np.asarray(levels))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            days_left = np.where(velocity > 0, np.asarray(quantities) / velocity, np.inf)
+
+        for index, product_id in enumerate(ids):
+            remaining = float(days_left[index])
+            yield ReorderSuggestion(
+                product_id=product_id,
+                quantity=quantities[index],
+                reorder_level=levels[index],
+                moving_average=round(float(moving_average[index]), 3),
+                velocity=round(float(velocity[index]), 3),
+                safety_stock=round(float(safety_stock[index]), 3),
+                suggested_reorder_level=int(suggested[index]),
+                days_until_stockout=round(remaining, 1) if math.isfinite(remaining) else None,
+            )
+
+
+def soonest_stockouts(limit, forecaster=None):
+    """The ``limit`` suggestions with the fewest days of stock left, with names."""
+    forecaster = forecaster or ReorderForecaster()
+    moving = (suggestion for suggestion in forecaster if suggestion.days_until_stockout is not None)
+    suggestions = heapq.nsmallest(limit, moving, key=lambda suggestion: suggestion.days_until_stockout)
+    products = Product.objects.only('name', 'sku').in_bulk([s.product_id for s in suggestions])
+    return [
+        {**suggestion.as_dict(), 'name': products[suggestion.product_id].name, 'sku': products[suggestion.product_id].sku}
+        for suggestion in suggestions
+    ]
+
+
+STOCKOUT_FORECAST_SIZE = 500
+STOCKOUT_FORECAST_KEY = 'inventory:forecast:stockouts'
+
+
+def _stockout_forecast_key():
+    return f'{STOCKOUT_FORECAST_KEY}:{timezone.localdate().isoformat()}'
+
+
+def refresh_stockout_forecast():
+    """Recompute the cached ``soonest_stockouts`` list and return it."""
+    value = soonest_stockouts(STOCKOUT_FORECAST_SIZE)
+    cache.set(_stockout_forecast_key(), value, settings.REORDER_FORECAST_CACHE_TIMEOUT)
+    return value
+
+
+def invalidate_stockout_forecast():
+    """Drop the cached forecast once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(_stockout_forecast_key()))
+
+
+def cached_stockout_forecast(limit=10):
+    """The first ``limit`` (at most ``STOCKOUT_FORECAST_SIZE``) rows of ``soonest_stockouts``.
+
+    One list is cached per day and shared by every ``limit``; it is dropped
+    when the rollup is rebuilt or reorder levels are applied, and otherwise
+    recomputed at most once per timeout. Unlike the other widgets it is not
+    tied to the data version, which every sale bumps; a full forecast pass
+    is too heavy to redo that often.
+    """
+    value = cache.get(_stockout_forecast_key())
+    if value is None:
+        value = refresh_stockout_forecast()
+    return value[:limit]
+
+
+def apply_reorder_levels(forecaster=None, min_change=1, batch_size=1000):
+    """Write suggested reorder levels that differ by at least ``min_change``.
+
+    Returns the number of products updated. Raised levels that put a product
+    at or below its threshold are reported to the low-stock outbox.
+    """
+    forecaster = forecaster or ReorderForecaster()
+    updated = 0
+    batch = []
+
+    def flush():
+        now = timezone.now()
+        with transaction.atomic():
+            # The forecast may be minutes old; judge crossings on current stock.
+            current = {
+                pk: (quantity, level)
+                for pk, quantity, level in Product.objects.select_for_update()
+                .filter(pk__in=[s.product_id for s in batch])
+                .values_list('pk', 'quantity', 'reorder_level')
+            }
+            changes = [
+                (
+                    Product(
+                        pk=s.product_id,
+                        quantity=current[s.product_id][0],
+                        reorder_level=s.suggested_reorder_level,
+                        updated_at=now,
+                    ),
+                    current[s.product_id][0] <= current[s.product_id][1],
+                )
+                for s in batch
+                if s.product_id in current
+            ]
+            Product.objects.bulk_update([product for product, _ in changes], ['reorder_level', 'updated_at'])
+            record_crossings(changes)
+            bump_data_version()
+            invalidate_stockout_forecast()
+        batch.clear()
+
+    for suggestion in forecaster:
+        if abs(suggestion.suggested_reorder_level - suggestion.reorder_level) >= min_change:
+            batch.append(suggestion)
+            updated += 1
+            if len(batch) == batch_size:
+                flush()
+    if batch:
+        flush()
+    return updated
@@ -1,6 +1,9 @@
+from decimal import Decimal, InvalidOperation
+
 from django import forms
+from django.db import transaction
 
-from .models import Category, Product, Sale, Supplier
+from .models import Category, Product, PurchaseOrder, PurchaseOrderLine, Sale, Supplier
 
 
 class StyledForm(forms.ModelForm):
@@ -126,3 +129,84 @@ class SaleForm(StyledForm):
 
         return cleaned
 
+
+class PurchaseOrderForm(StyledForm):
+    # Lines are typed or pasted as text: a product dropdown per line does not
+    # scale to a catalog, or to orders with hundreds of lines.
+    lines = forms.CharField(
+        label='Lines',
+        widget=forms.Textarea(attrs={'rows': 12, 'placeholder': 'SKU-001, 24, 3.50'}),
+        help_text='One product per line: SKU, quantity and an optional unit cost, separated by commas.',
+    )
+
+    class Meta:
+        model = PurchaseOrder
+        fields = ('supplier', 'reference', 'notes')
+        labels = {
+            'supplier': 'Supplier',
+            'reference': 'Supplier Reference',
+            'notes': 'Notes',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['supplier'].queryset = Supplier.objects.filter(is_active=True)
+        if self.instance.pk and not self.is_bound:
+            self.initial['lines'] = '\n'.join(
+                f'{line.product.sku}, {line.quantity}, {line.unit_cost}'
+                for line in self.instance.lines.select_related('product')
+            )
+
+    def clean_lines(self):
+        parsed = {}
+        errors = []
+        for number, raw in enumerate(self.cleaned_data['lines'].splitlines(), start=1):
+            if not raw.strip():
+                continue
+            parts = [part.strip() for part in raw.split(',')]
+            if len(parts) not in (2, 3) or not parts[0]:
+                errors.append(f'Line {number}: expected "SKU, quantity" or "SKU, quantity, unit cost".')
+                continue
+            sku = parts[0]
+            try:
+                quantity = int(parts[1])
+                unit_cost = Decimal(parts[2].lstrip('$') or '0') if len(parts) == 3 else Decimal('0')
+            except (ValueError, InvalidOperation):
+                errors.append(f'Line {number}: quantity and unit cost must be numbers.')
+                continue
+            if quantity <= 0 or unit_cost < 0:
+                errors.append(f'Line {number}: quantity must be positive and unit cost not negative.')
+            elif sku in parsed:
+                errors.append(f'Line {number}: {sku} is already on this order.')
+            else:
+                parsed[sku] = (quantity, unit_cost.quantize(Decimal('0.01')))
+
+        products = Product.objects.filter(sku__in=parsed).in_bulk(field_name='sku')
+        unknown = [sku for sku in parsed if sku not in products]
+        if unknown:
+            errors.append('Unknown SKUs: ' + ', '.join(unknown[:10]) + (' …' if len(unknown) > 10 else ''))
+        if len(parsed) > PurchaseOrder.MAX_LINES:
+            errors.append(f'At most {PurchaseOrder.MAX_LINES} lines per order.')
+        if errors:
+            raise forms.ValidationError(errors[:20])
+        if not parsed:
+            raise forms.ValidationError('Add at least one line.')
+        return [
+            PurchaseOrderLine(product=products[sku], quantity=quantity, unit_cost=unit_cost)
+            for sku, (quantity, unit_cost) in parsed.items()
+        ]
+
+    def save(self, commit=True):
+        if not commit:
+            # The lines are written by save_m2m() once the order is saved.
+            return super().save(commit=False)
+        with transaction.atomic():
+            return super().save()
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        order = self.instance
+        order.lines.all().delete()
+        for line in self.cleaned_data['lines']:
+            line.order = order
+        PurchaseOrderLine.objects.bulk_create(self.cleaned_data['lines'])
@@ -0,0 +1,88 @@
+"""Idempotency keys for sale creation, so client retries do not sell twice.
+
+A client sends the same ``Idempotency-Key`` header with every attempt of one
+request. :func:`run_once` inserts the key in the same transaction as the
+sale. A concurrent duplicate blocks on the unique index until the first
+attempt finishes. It then replays the stored response if the sale committed,
+or runs normally if the first attempt rolled back. Only successful responses
+are stored, so a request that failed validation can be retried with the
+same key.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a request with a different payload."""
+
+
+def request_key(request, field=None):
+    """The request's ``Idempotency-Key`` header, or the POST ``field`` forms send instead."""
+    key = request.headers.get(HEADER) or (field and request.POST.get(field)) or ''
+    return key.strip()
+
+
+def fingerprint(data):
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cutoff():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def run_once(user, scope, key, request_fingerprint, handler, serialize, replay):
+    """Return ``handler()``, or ``replay(record)`` if this key already succeeded.
+
+    ``serialize(response)`` gives the JSON payload to store, or None for a
+    response that should not be remembered; that, or an exception, discards
+    the key and everything the handler wrote. Raises
+    :class:`IdempotencyKeyReused` when the key was used with another
+    fingerprint.
+    """
+    with transaction.atomic():
+        # A key past its TTL is as good as unused, even before the purge runs.
+        IdempotencyKey.objects.filter(user=user, scope=scope, key=key, created_at__lt=cutoff()).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, scope=scope, key=key, fingerprint=request_fingerprint
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.get(user=user, scope=scope, key=key)
+            if record.fingerprint != request_fingerprint:
+                raise IdempotencyKeyReused(f'{HEADER} {key!r} was already used for a different request.')
+            return replay(record)
+
+        response = handler()
+        payload = serialize(response)
+        if payload is None:
+            transaction.set_rollback(True)
+        else:
+            record.status_code = response.status_code
+            record.response = payload
+            record.save(update_fields=['status_code', 'response'])
+        return response
+
+
+def purge_expired_keys(batch_size=5000):
+    """Delete keys older than ``IDEMPOTENCY_KEY_TTL`` in batches; return how many."""
+    deleted = 0
+    expired = IdempotencyKey.objects.filter(created_at__lt=cutoff())
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
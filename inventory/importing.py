@@ -0,0 +1,246 @@
+"""Bulk product import from CSV or XLSX, upserting by SKU."""
+
+import csv
+import io
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from .caching import bump_data_version
+from .ledger import record_movements
+from .models import Category, Product, StockMovement, Supplier
+
+REQUIRED_COLUMNS = ('sku', 'name', 'category')
+OPTIONAL_COLUMNS = ('supplier', 'description', 'quantity', 'reorder_level', 'price', 'is_active')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'active'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'inactive'}
+# Limits of PositiveIntegerField and DecimalField(max_digits=10, decimal_places=2).
+MAX_COUNT = 2147483647
+MAX_PRICE = Decimal('100000000')
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be read as a product sheet at all."""
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row_number, sku, message):
+        self.errors.append({'row': row_number, 'sku': sku, 'error': message})
+
+    def as_dict(self):
+        return {'created': self.created, 'updated': self.updated, 'errors': self.errors}
+
+
+def read_rows(fileobj, filename):
+    """Yield ``(row_number, {column: value})`` from a CSV or XLSX upload, lazily."""
+    if filename.lower().endswith('.xlsx'):
+        return _read_xlsx(fileobj)
+    return _read_csv(fileobj)
+
+
+def _normalise_header(header):
+    columns = [str(name or '').strip().lower().replace(' ', '_') for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ImportFormatError(f'Missing required columns: {", ".join(missing)}.')
+    return columns
+
+
+def _read_csv(fileobj):
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(fileobj)
+    try:
+        columns = _normalise_header(next(reader))
+    except StopIteration:
+        raise ImportFormatError('The file is empty.')
+    for row_number, values in enumerate(reader, start=2):
+        if any(value.strip() for value in values):
+            yield row_number, dict(zip(columns, values))
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('XLSX import requires the openpyxl package.')
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            columns = _normalise_header(next(rows))
+        except StopIteration:
+            raise ImportFormatError('The sheet is empty.')
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, {
+                    column: '' if value is None else str(value)
+                    for column, value in zip(columns, values)
+                }
+    finally:
+        workbook.close()
+
+
+def parse_count(name, value):
+    """Parse a stock count cell; "12" and "12.0" are fine, "1.5" and "1e999" are not."""
+    try:
+        number = Decimal(value)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'{name} must be a whole number.')
+    if not number.is_finite() or number != number.to_integral_value():
+        raise ValueError(f'{name} must be a whole number.')
+    if number < 0:
+        raise ValueError(f'{name} cannot be negative.')
+    if number > MAX_COUNT:
+        raise ValueError(f'{name} cannot be more than {MAX_COUNT}.')
+    # Infinity and NaN were rejected above, so int() cannot overflow.
+    return int(number)
+
+
+class ProductImporter:
+    """Upsert products in chunks, resolving categories and suppliers by name.
+
+    Only the cells filled in on a row are written on update, so a price
+    list without a ``quantity`` column, or with blank quantities, leaves
+    stock levels alone.
+    """
+
+    def __init__(self, chunk_size=1000, create_missing=True):
+        self.chunk_size = chunk_size
+        self.create_missing = create_missing
+        self.categories = dict(Category.objects.values_list('name', 'pk'))
+        self.suppliers = dict(Supplier.objects.values_list('name', 'pk'))
+        self.report = ImportReport()
+
+    def run(self, rows):
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self.import_chunk(chunk)
+        if self.report.created or self.report.updated:
+            bump_data_version()
+        return self.report
+
+    def _lookup(self, cache, model, name):
+        if not name:
+            return None
+        if name not in cache:
+            if not self.create_missing:
+                raise ValueError(f'Unknown {model._meta.verbose_name} "{name}".')
+            cache[name] = model.objects.get_or_create(name=name)[0].pk
+        return cache[name]
+
+    def build_product(self, values, columns):
+        """Return the product and the optional fields its row sets.
+
+        A blank cell leaves the field out, so updating an existing product
+        never overwrites it with the model default.
+        """
+        product = Product(sku=values['sku'].strip(), name=values['name'].strip())
+        if not product.sku or not product.name:
+            raise ValueError('SKU and name are required.')
+        product.category_id = self._lookup(self.categories, Category, values['category'].strip())
+        if product.category_id is None:
+            raise ValueError('Category is required.')
+        cells = {name: values[name].strip() for name in OPTIONAL_COLUMNS if name in columns}
+        cells = {name: value for name, value in cells.items() if value}
+        if 'supplier' in cells:
+            product.supplier_id = self._lookup(self.suppliers, Supplier, cells['supplier'])
+        if 'description' in cells:
+            product.description = cells['description']
+        for name in ('quantity', 'reorder_level'):
+            if name in cells:
+                setattr(product, name, parse_count(name, cells[name]))
+        if 'price' in cells:
+            try:
+                product.price = Decimal(cells['price'].lstrip('$')).quantize(Decimal('0.01'))
+            except (InvalidOperation, ValueError):
+                raise ValueError('price must be a number.')
+            if not product.price.is_finite():
+                raise ValueError('price must be a number.')
+            if product.price < 0:
+                raise ValueError('price cannot be negative.')
+            if product.price >= MAX_PRICE:
+                raise ValueError(f'price must be less than {MAX_PRICE}.')
+        if 'is_active' in cells:
+            flag = cells['is_active'].lower()
+            if flag not in TRUE_VALUES | FALSE_VALUES:
+                raise ValueError('is_active must be yes or no.')
+            product.is_active = flag in TRUE_VALUES
+        return product, tuple(cells)
+
+    def import_chunk(self, chunk):
+        columns = set(chunk[0][1])
+        # Later rows win when a sheet repeats a SKU.
+        products = {}
+        for row_number, values in chunk:
+            try:
+                product, fields = self.build_product(values, columns)
+            except ValueError as exc:
+                self.report.add_error(row_number, values.get('sku', ''), str(exc))
+                continue
+            products[product.sku] = (row_number, product, fields)
+        if not products:
+            return
+
+        # Rows leaving different cells blank update different columns.
+        groups = {}
+        for sku, (row_number, product, fields) in products.items():
+            groups.setdefault(fields, {})[sku] = (row_number, product)
+        existing = set(Product.objects.filter(sku__in=products).values_list('sku', flat=True))
+        for fields, group in groups.items():
+            self.import_group(group, ['name', 'category', 'updated_at', *fields], existing)
+
+    def import_group(self, products, update_fields, existing):
+        try:
+            with transaction.atomic():
+                self._upsert([product for _, product in products.values()], update_fields)
+        except IntegrityError:
+            # Something in the group clashes (e.g. name + supplier); isolate it.
+            for sku, (row_number, product) in products.items():
+                try:
+                    with transaction.atomic():
+                        self._upsert([product], update_fields)
+                except IntegrityError as exc:
+                    self.report.add_error(row_number, sku, f'Conflicts with an existing product: {exc}')
+                else:
+                    self._count(sku in existing)
+            return
+        for sku in products:
+            self._count(sku in existing)
+
+    def _upsert(self, products, update_fields):
+        skus = [product.sku for product in products]
+        if 'quantity' in update_fields:
+            before = dict(
+                Product.objects.select_for_update().filter(sku__in=skus).values_list('sku', 'quantity')
+            )
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=update_fields,
+        )
+        if 'quantity' in update_fields:
+            after = Product.objects.filter(sku__in=skus).values_list('pk', 'sku', 'quantity')
+            record_movements(
+                StockMovement(
+                    product_id=pk,
+                    kind=StockMovement.Kind.ADJUSTMENT,
+                    quantity=quantity - before.get(sku, 0),
+                    note='Product import',
+                )
+                for pk, sku, quantity in after
+            )
+
+    def _count(self, updated):
+        if updated:
+            self.report.updated += 1
+        else:
+            self.report.created += 1
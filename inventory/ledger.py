@@ -0,0 +1,150 @@
+"""Append-only stock ledger and the snapshots that keep point-in-time reads cheap.
+
+Every change to ``Product.quantity`` is paired with a ``StockMovement`` written
+in the same transaction, so the column is a projection of the ledger.
+:func:`take_snapshots` (the ``take_stock_snapshots`` command, run daily) stores
+each changed product's level, which bounds how many movements
+:func:`stock_as_of` has to sum.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockSnapshot
+
+# Movements are stamped when they are written, not when they commit. Snapshots
+# only cover times at least this far back so no late commit lands behind one.
+SETTLE_SECONDS = 300
+
+
+def record_movements(movements, *, using=None):
+    """Insert ``movements`` in one statement, skipping zero-quantity entries."""
+    movements = [movement for movement in movements if movement.quantity]
+    if movements:
+        StockMovement.objects.using(using).bulk_create(movements)
+    return movements
+
+
+def record_opening_balances(products, *, using=None):
+    """Ledger entries for products inserted with ``bulk_create`` and some stock."""
+    return record_movements(
+        [
+            StockMovement(
+                product_id=product.pk,
+                kind=StockMovement.Kind.ADJUSTMENT,
+                quantity=product.quantity,
+                note='Opening balance',
+            )
+            for product in products
+        ],
+        using=using,
+    )
+
+
+def stock_as_of(product_id, when):
+    return stock_as_of_many([product_id], when).get(product_id, 0)
+
+
+def stock_as_of_many(product_ids, when):
+    """Map each product id to its stock at ``when``.
+
+    Each level is the product's latest snapshot at or before ``when`` plus
+    the movements after it. Products sharing a snapshot time are summed in
+    one grouped query, so a batch costs one query per distinct snapshot.
+    """
+    latest = StockSnapshot.objects.filter(product=OuterRef('pk'), taken_at__lte=when).order_by('-taken_at')
+    rows = (
+        Product.objects.filter(pk__in=list(product_ids))
+        .annotate(
+            base_at=Subquery(latest.values('taken_at')[:1]),
+            base=Subquery(latest.values('quantity')[:1]),
+        )
+        .values_list('pk', 'base_at', 'base')
+    )
+    levels = {}
+    since = defaultdict(list)
+    for pk, base_at, base in rows:
+        levels[pk] = base or 0
+        since[base_at].append(pk)
+
+    for base_at, pks in since.items():
+        movements = StockMovement.objects.filter(product_id__in=pks, created_at__lte=when)
+        if base_at is not None:
+            movements = movements.filter(created_at__gt=base_at)
+        totals = movements.order_by().values('product_id').annotate(total=Sum('quantity'))
+        for row in totals:
+            levels[row['product_id']] += row['total']
+    return levels
+
+
+def start_of_today():
+    return timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def take_snapshots(as_of=None, batch_size=1000):
+    """Snapshot every product with movements since the previous snapshot run.
+
+    Products that did not move keep their older snapshot, which still
+    answers :func:`stock_as_of` exactly. Returns how many products were
+    snapshotted.
+    """
+    as_of = as_of or start_of_today()
+    if as_of > timezone.now() - timedelta(seconds=SETTLE_SECONDS):
+        raise ValueError(f'Snapshots must be at least {SETTLE_SECONDS} seconds in the past.')
+
+    previous = StockSnapshot.objects.filter(taken_at__lt=as_of).aggregate(latest=Max('taken_at'))['latest']
+    changed = StockMovement.objects.filter(created_at__lte=as_of)
+    if previous is not None:
+        changed = changed.filter(created_at__gt=previous)
+    product_ids = sorted(changed.order_by().values_list('product_id', flat=True).distinct())
+
+    for start in range(0, len(product_ids), batch_size):
+        levels = stock_as_of_many(product_ids[start : start + batch_size], as_of)
+        StockSnapshot.objects.bulk_create(
+            [StockSnapshot(product_id=pk, taken_at=as_of, quantity=quantity) for pk, quantity in levels.items()],
+            ignore_conflicts=True,
+        )
+    return len(product_ids)
+
+
+def reconcile(fix=False, batch_size=1000):
+    """Return ``(product_id, quantity, ledger_total)`` for every product that drifted.
+
+    Each batch of products is locked while it is compared so in-flight sales
+    cannot cause false alarms. With ``fix``, an adjustment brings the ledger
+    in line with ``Product.quantity``.
+    """
+    drift = []
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            quantities = dict(
+                Product.objects.select_for_update()
+                .filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'quantity')[:batch_size]
+            )
+            if not quantities:
+                return drift
+            last_pk = max(quantities)
+            ledger = stock_as_of_many(quantities, timezone.now())
+            mismatched = [
+                (pk, quantity, ledger[pk]) for pk, quantity in quantities.items() if quantity != ledger[pk]
+            ]
+            if fix:
+                record_movements(
+                    [
+                        StockMovement(
+                            product_id=pk,
+                            kind=StockMovement.Kind.ADJUSTMENT,
+                            quantity=quantity - total,
+                            note='Reconciliation',
+                        )
+                        for pk, quantity, total in mismatched
+                    ]
+                )
+        drift.extend(mismatched)
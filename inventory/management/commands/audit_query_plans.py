@@ -0,0 +1,118 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.utils import timezone
+
+from inventory.models import DailySalesRollup, Product, Sale
+from inventory.rollups import rebuild_daily_rollup
+from inventory.seeding import seed_dataset
+from inventory.views import filter_sales, low_stock_products
+
+SEQUENTIAL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (inventory_\w+)'),
+    # "SCAN table" without "USING ... INDEX" is a full table scan in SQLite.
+    'sqlite': re.compile(r'\bSCAN (inventory_\w+)\b(?! USING)'),
+}
+# A sort the index order should have made unnecessary.
+SORT_PATTERNS = {
+    'postgresql': re.compile(r'^\s*(?:->\s*)?((?:Incremental )?Sort)\b', re.MULTILINE),
+    'sqlite': re.compile(r'\bUSE (TEMP B-TREE FOR [\w ]+)'),
+}
+
+
+def plan_problems(plan, vendor):
+    """Sequential scans and sorts in ``plan``, e.g. ``['SCAN inventory_sale']``."""
+    scans = [f'SCAN {table}' for table in SEQUENTIAL_SCAN_PATTERNS[vendor].findall(plan)]
+    sorts = SORT_PATTERNS[vendor].findall(plan)
+    return sorted(set(scans + sorts))
+
+
+class _Rollback(Exception):
+    pass
+
+
+def hot_queries():
+    """The filter and ordering paths served by the dashboard, analytics and list views."""
+    product_id = Product.objects.order_by('pk').values_list('pk', flat=True).first()
+    seller = Sale.objects.order_by('pk').values_list('sold_by_id', flat=True).first()
+    today = timezone.localdate()
+    window = QueryDict(mutable=True)
+    window.update({'start': (today - timedelta(days=30)).isoformat(), 'end': today.isoformat()})
+    newest = ('-created_at', '-id')
+
+    queries = [
+        (
+            'dashboard recent sales',
+            Sale.objects.filter(created_at__gte=timezone.now() - timedelta(days=30)).order_by(*newest)[:5],
+        ),
+        ('sales list date range', filter_sales(Sale.objects.all(), window).order_by(*newest)[:51]),
+        ('low stock count', low_stock_products().order_by()),
+        ('low stock preview', low_stock_products()[:5]),
+        ('active products for sale form', Product.objects.filter(is_active=True)[:50]),
+        (
+            'rollup last 30 days',
+            DailySalesRollup.objects.filter(date__gte=today - timedelta(days=30)).order_by(),
+        ),
+    ]
+    if product_id:
+        by_product = window.copy()
+        by_product['product'] = str(product_id)
+        queries.append(
+            ('sales list by product', filter_sales(Sale.objects.all(), by_product).order_by(*newest)[:51])
+        )
+    if seller:
+        by_seller = window.copy()
+        by_seller['user'] = str(seller)
+        queries.append(
+            ('sales list by seller', filter_sales(Sale.objects.all(), by_seller).order_by(*newest)[:51])
+        )
+    return queries
+
+
+class Command(BaseCommand):
+    help = 'Fail if the hot view queries fall back to sequential scans or sorts on a large dataset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-products',
+            type=int,
+            default=20000,
+            help='Products to seed inside a rolled-back transaction (0 audits existing data).',
+        )
+        parser.add_argument('--seed-sales', type=int, default=200000)
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQUENTIAL_SCAN_PATTERNS:
+            raise CommandError(f'No plan audit rules for the {connection.vendor} backend.')
+
+        failures = []
+        try:
+            with transaction.atomic():
+                if options['seed_products']:
+                    seed_dataset(
+                        products=options['seed_products'],
+                        sales=options['seed_sales'],
+                        tag='audit',
+                    )
+                    rebuild_daily_rollup()
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                for label, queryset in hot_queries():
+                    plan = queryset.explain()
+                    problems = plan_problems(plan, connection.vendor)
+                    status = self.style.ERROR('FAIL') if problems else self.style.SUCCESS('ok')
+                    self.stdout.write(f'{status:>10}  {label}')
+                    if options['verbosity'] > 1 or problems:
+                        self.stdout.write(f'            {plan}'.replace('\n', '\n            '))
+                    if problems:
+                        failures.append(f'{label}: {", ".join(problems)}')
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError('Sequential scans or sorts found:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All hot queries are index-backed.'))
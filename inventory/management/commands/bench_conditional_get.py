@@ -0,0 +1,109 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.backends.django import Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.serializers import Serializer
+
+from accounts.models import User
+from inventory.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Time full GETs of the catalog read routes against revalidations with '
+        'If-None-Match, and check that a hit returns 304 without serializing or '
+        'rendering anything.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--username', help='Account to benchmark as (defaults to the first manager).')
+
+    def routes(self):
+        product = Product.objects.order_by('pk').first()
+        if product is None:
+            raise CommandError('Seed some products first (manage.py seed_inventory).')
+        return [
+            reverse('api-product-list'),
+            reverse('api-product-list') + '?fields=id,name,quantity',
+            reverse('api-product-detail', args=[product.pk]),
+            reverse('api-category-list'),
+            reverse('api-supplier-list'),
+            reverse('product-list'),
+            reverse('supplier-list'),
+            reverse('category-list'),
+        ]
+
+    def measure(self, client, url, headers, iterations):
+        """Return ``(last response, mean ms, queries per request, render calls)``."""
+        calls = {'serialize': 0, 'render': 0}
+        to_representation = Serializer.to_representation
+        render = Template.render
+
+        def counting_to_representation(serializer, instance):
+            calls['serialize'] += 1
+            return to_representation(serializer, instance)
+
+        def counting_render(template, *args, **kwargs):
+            calls['render'] += 1
+            return render(template, *args, **kwargs)
+
+        with (
+            mock.patch.object(Serializer, 'to_representation', counting_to_representation),
+            mock.patch.object(Template, 'render', counting_render),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                response = client.get(url, headers=headers)
+            elapsed = time.perf_counter() - started
+        return response, elapsed * 1000 / iterations, len(queries) / iterations, sum(calls.values())
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['username']:
+            user = users.filter(username=options['username']).first()
+        else:
+            user = users.filter(role=User.Roles.MANAGER).first()
+        if user is None:
+            raise CommandError('No matching active manager to benchmark as.')
+        client = Client()
+        client.force_login(user)
+        iterations = options['iterations']
+
+        failures = []
+        for url in self.routes():
+            full, full_ms, full_queries, _ = self.measure(client, url, {}, iterations)
+            if full.status_code != 200 or not full.has_header('ETag'):
+                failures.append(f'{url}: expected 200 with an ETag, got {full.status_code}')
+                continue
+            hit, hit_ms, hit_queries, work = self.measure(
+                client, url, {'If-None-Match': full['ETag']}, iterations
+            )
+            self.stdout.write(
+                f'{url:40} full {full_ms:7.1f} ms {full_queries:4.0f} queries | '
+                f'304 {hit_ms:6.1f} ms {hit_queries:4.0f} queries'
+            )
+            if hit.status_code != 304:
+                failures.append(f'{url}: revalidation returned {hit.status_code}, not 304')
+            if work:
+                failures.append(f'{url}: revalidation serialized or rendered {work} times')
+
+        # Any write to a listed row must change the tag.
+        url = reverse('api-product-list')
+        etag = client.get(url)['ETag']
+        product = Product.objects.order_by('pk').first()
+        Product.objects.filter(pk=product.pk).update(updated_at=timezone.now())
+        changed = client.get(url, headers={'If-None-Match': etag})
+        if changed.status_code != 200 or changed['ETag'] == etag:
+            failures.append(f'{url}: a product write did not change the ETag')
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Every revalidation returned 304 with no serialization.'))
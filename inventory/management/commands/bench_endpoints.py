@@ -0,0 +1,209 @@
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+
+from accounts.models import User
+from inventory.models import Category, Product, Sale, Supplier
+
+URLCONFS = ('inventory.urls', 'accounts.urls', 'inventory.api_urls')
+# Routes that only accept POST, would end the benchmark session, or never
+# finish responding.
+SKIPPED = {'logout', 'user-deactivate', 'stock-events'}
+SAMPLE_MODELS = {
+    'product': Product,
+    'supplier': Supplier,
+    'category': Category,
+    'sale': Sale,
+    'user': User,
+}
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every inventory, accounts and API GET route, record query count, '
+        'p50/p95 latency and peak memory, and compare them with a JSON baseline. '
+        'The committed benchmarks/baseline.json was recorded on a database freshly '
+        'seeded with seed_inventory; refresh it with --update-baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--username', help='Account to benchmark as (defaults to the first manager).')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--update-baseline', action='store_true')
+        parser.add_argument('--output', help='Also write this run to a JSON file.')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed relative growth in p95 latency and peak memory.',
+        )
+        parser.add_argument('--slack-ms', type=float, default=5.0, help='Absolute latency noise allowance.')
+        parser.add_argument('--only', nargs='*', help='Only benchmark these route names.')
+
+    def sample_kwargs(self, name):
+        resolver = get_resolver()
+        for possibility, _, _, _ in resolver.reverse_dict.getlist(name):
+            for _, params in possibility:
+                if 'format' in params:
+                    continue
+                kwargs = {}
+                for param in params:
+                    value = self.sample_value(name, param)
+                    if value is None:
+                        break
+                    kwargs[param] = value
+                else:
+                    return kwargs
+        return None
+
+    def sample_value(self, name, param):
+        if param == 'sku':
+            return Product.objects.order_by('pk').values_list('sku', flat=True).first()
+        model = next(
+            (model for key, model in SAMPLE_MODELS.items() if name.removeprefix('api-').startswith(key)),
+            None,
+        )
+        if model is None:
+            return None
+        return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+    def endpoints(self, only):
+        seen = set()
+        for urlconf in URLCONFS:
+            for name in route_names(get_resolver(urlconf).url_patterns):
+                if name in seen or name in SKIPPED or (only and name not in only):
+                    continue
+                seen.add(name)
+                kwargs = self.sample_kwargs(name)
+                if kwargs is None:
+                    self.stderr.write(f'Skipping {name}: no sample object.')
+                    continue
+                try:
+                    yield name, reverse(name, kwargs=kwargs)
+                except NoReverseMatch:
+                    self.stderr.write(f'Skipping {name}: cannot reverse.')
+
+    def measure(self, client, path, iterations):
+        def fetch():
+            response = client.get(path)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response
+
+        timings = []
+        queries = 0
+        status = None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = fetch()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+            status = response.status_code
+
+        # Memory is traced in a separate pass so tracing does not skew latency.
+        tracemalloc.start()
+        fetch()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'status': status,
+            'queries': queries,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def regressions(self, name, result, baseline, options):
+        expected = baseline.get(name)
+        if not expected:
+            return []
+        problems = []
+        if result['queries'] > expected['queries']:
+            problems.append(f"queries {expected['queries']} -> {result['queries']}")
+        limit = expected['p95_ms'] * (1 + options['tolerance']) + options['slack_ms']
+        if result['p95_ms'] > limit:
+            problems.append(f"p95 {expected['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result['peak_kib'] > expected['peak_kib'] * (1 + options['tolerance']) + 64:
+            problems.append(f"peak {expected['peak_kib']}KiB -> {result['peak_kib']}KiB")
+        return [f'{name}: {problem}' for problem in problems]
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['username']) if options['username'] else (
+            User.objects.filter(role=User.Roles.MANAGER, is_active=True).order_by('pk')
+        )
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to benchmark as; run seed_inventory first.')
+        client = Client()
+        client.force_login(user)
+
+        baseline_path = Path(options['baseline'])
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())
+        elif options['update_baseline']:
+            baseline = {}
+        else:
+            raise CommandError(
+                f'No baseline at {baseline_path}. Create one on a freshly seeded database with '
+                '`manage.py seed_inventory && manage.py bench_endpoints --update-baseline`.'
+            )
+
+        results = {}
+        failures = []
+        self.stdout.write(f"{'route':<28} {'status':>6} {'queries':>8} {'p50 ms':>9} {'p95 ms':>9} {'peak KiB':>10}")
+        for name, path in self.endpoints(options['only']):
+            if client.get(path).status_code == 405:
+                # POST-only actions such as api-sale-bulk.
+                continue
+            result = self.measure(client, path, options['iterations'])
+            results[name] = {'path': path, **result}
+            self.stdout.write(
+                f"{name:<28} {result['status']:>6} {result['queries']:>8} "
+                f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['peak_kib']:>10}"
+            )
+            if result['status'] >= 400:
+                failures.append(f"{name}: HTTP {result['status']}")
+            failures.extend(self.regressions(name, result, baseline, options))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2) + '\n')
+        if options['update_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps({**baseline, **results}, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}.'))
+            return
+        unmeasured = sorted(set(results) - set(baseline))
+        if unmeasured:
+            self.stdout.write(
+                self.style.WARNING(f"Not in the baseline, so not compared: {', '.join(unmeasured)}.")
+            )
+        if failures:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,51 @@
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Stream a sales or product export and report throughput and peak memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/sales/export/', help='Export URL, with any filters.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--username', help='User to export as (defaults to the first superuser).')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['username']) if options['username'] else (
+            User.objects.filter(is_superuser=True)
+        )
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to run the export as.')
+
+        client = Client()
+        client.force_login(user)
+        separator = '&' if '?' in options['path'] else '?'
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get(f"{options['path']}{separator}format={options['format']}")
+        if not response.streaming:
+            raise CommandError(f'{options["path"]} did not return a streaming response.')
+        size = lines = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+        elapsed = time.perf_counter() - started
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        self.stdout.write(f'{lines} lines, {size / 1_048_576:.1f} MiB in {elapsed:.2f}s')
+        self.stdout.write(f'Python heap peak: {traced_peak / 1_048_576:.1f} MiB')
+        # ru_maxrss is reported in KiB on Linux.
+        self.stdout.write(
+            f'Peak RSS: {rss_after / 1024:.1f} MiB (grew {(rss_after - rss_before) / 1024:.1f} MiB during export)'
+        )
@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare product and sales list render times with cold and warm fragment caches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--username', help='Account to render as (defaults to the first manager).')
+
+    def time_page(self, client, path, iterations, cold):
+        timings = []
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned HTTP {response.status_code}.')
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['username']) if options['username'] else (
+            User.objects.filter(role=User.Roles.MANAGER, is_active=True).order_by('pk')
+        )
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to render as; run seed_inventory first.')
+        client = Client()
+        client.force_login(user)
+
+        for label, path in (
+            ('products, 20 rows', '/products/'),
+            ('sales, 100 rows', '/sales/?page_size=100'),
+        ):
+            cold = self.time_page(client, path, options['iterations'], cold=True)
+            warm = self.time_page(client, path, options['iterations'], cold=False)
+            self.stdout.write(
+                f'{label:<20} cold {cold:7.2f} ms   warm {warm:7.2f} ms   '
+                f'saved {100 * (cold - warm) / cold:4.1f}%'
+            )
@@ -0,0 +1,83 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from inventory.ledger import record_opening_balances, stock_as_of_many
+from inventory.models import Category, Product, PurchaseOrder, PurchaseOrderLine, Supplier
+from inventory.stock import receive_purchase_order
+
+
+class Command(BaseCommand):
+    help = (
+        'Time receiving a purchase order against restocking the same products one '
+        'Product.save at a time, as managers did before purchase orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=1000)
+        parser.add_argument('--quantity', type=int, default=12, help='Units received per line.')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        category = Category.objects.create(name=f'bench-{tag}')
+        supplier = Supplier.objects.create(name=f'bench-{tag}')
+        products = Product.objects.bulk_create(
+            Product(
+                name=f'Bench {tag} {index}',
+                sku=f'BENCH-{tag}-{index}',
+                category=category,
+                supplier=supplier,
+                quantity=10,
+                price=Decimal('2.50'),
+            )
+            for index in range(options['lines'])
+        )
+        record_opening_balances(products)
+        order = PurchaseOrder.objects.create(supplier=supplier, reference=f'bench-{tag}')
+        PurchaseOrderLine.objects.bulk_create(
+            PurchaseOrderLine(order=order, product=product, quantity=options['quantity'])
+            for product in products
+        )
+
+        try:
+            with CaptureQueriesContext(connection) as per_product_queries:
+                started = time.perf_counter()
+                with transaction.atomic():
+                    for product in Product.objects.filter(category=category):
+                        product.quantity += options['quantity']
+                        product.save()
+                per_product = time.perf_counter() - started
+
+            with CaptureQueriesContext(connection) as receipt_queries:
+                started = time.perf_counter()
+                order = receive_purchase_order(order.pk)
+                receipt = time.perf_counter() - started
+
+            expected = 10 + 2 * options['quantity']
+            levels = stock_as_of_many([product.pk for product in products], order.received_at)
+            wrong = sum(
+                1
+                for pk, quantity in Product.objects.filter(category=category).values_list('pk', 'quantity')
+                if quantity != expected or levels[pk] != expected
+            )
+        finally:
+            order.delete()
+            Product.objects.filter(category=category).delete()
+            supplier.delete()
+            category.delete()
+
+        lines = options['lines']
+        self.stdout.write(
+            f'per-product save: {lines} products in {per_product * 1000:.0f} ms, '
+            f'{len(per_product_queries)} queries'
+        )
+        self.stdout.write(
+            f'purchase receipt: {lines} lines in {receipt * 1000:.0f} ms, {len(receipt_queries)} queries'
+        )
+        if wrong:
+            self.stderr.write(f'{wrong} products ended with the wrong quantity or ledger total.')
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {per_product / receipt:.1f}x'))
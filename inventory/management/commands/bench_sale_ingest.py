@@ -0,0 +1,70 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from inventory.ledger import record_opening_balances
+from inventory.models import Category, Product, Sale
+
+
+class Command(BaseCommand):
+    help = 'Compare per-item POST /api/sales/ against POST /api/sales/bulk/ throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sales', type=int, default=500)
+        parser.add_argument('--products', type=int, default=20)
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        category = Category.objects.create(name=f'bench-{tag}')
+        products = Product.objects.bulk_create(
+            Product(
+                name=f'Bench {tag} {index}',
+                sku=f'BENCH-{tag}-{index}',
+                category=category,
+                quantity=options['sales'] * 2,
+                price=Decimal('2.50'),
+            )
+            for index in range(options['products'])
+        )
+        record_opening_balances(products)
+        user = User(username=f'bench-{tag}')
+        user.set_password(uuid.uuid4().hex)
+        user.save()
+
+        client = APIClient()
+        client.force_authenticate(user)
+        payload = [
+            {
+                'product': products[index % len(products)].pk,
+                'quantity': 1,
+                'unit_price': '2.50',
+            }
+            for index in range(options['sales'])
+        ]
+
+        try:
+            started = time.perf_counter()
+            for item in payload:
+                client.post('/api/sales/', item, format='json')
+            per_item = time.perf_counter() - started
+
+            started = time.perf_counter()
+            response = client.post('/api/sales/bulk/', payload, format='json')
+            bulk = time.perf_counter() - started
+        finally:
+            Sale.objects.filter(product__category=category).delete()
+            Product.objects.filter(category=category).delete()
+            category.delete()
+            user.delete()
+
+        count = len(payload)
+        self.stdout.write(f'per-item: {count} sales in {per_item:.2f}s ({count / per_item:.0f}/s)')
+        self.stdout.write(
+            f'bulk:     {len(response.data["created"])} sales in {bulk:.2f}s ({count / bulk:.0f}/s), '
+            f'{len(response.data["errors"])} errors'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {per_item / bulk:.1f}x'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from inventory.models import Product
+
+from .load_test_server import run_load, session_cookie
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/sec of the async stock lookup with the DRF product retrieve on a '
+        'running server. Start it with SERVER_INTERFACE=asgi to measure the async path as deployed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+        parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 16, 64])
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint and concurrency level.')
+        parser.add_argument('--products', type=int, default=50, help='How many products the polls rotate over.')
+        parser.add_argument('--batch-size', type=int, default=20, help='SKUs per batch lookup.')
+
+    def handle(self, *args, **options):
+        products = list(Product.objects.order_by('pk').values_list('pk', 'sku')[: options['products']])
+        if not products:
+            raise CommandError('No products to look up; run seed_inventory first.')
+        cookie = session_cookie()
+        base = options['url'].rstrip('/')
+        batch = '&'.join(f'sku={sku}' for _, sku in products[: options['batch_size']])
+        endpoints = {
+            'drf retrieve': [reverse('api-product-detail', args=[pk]) for pk, _ in products],
+            'async stock': [reverse('api-stock', args=[sku]) for _, sku in products],
+            f"async batch x{options['batch_size']}": [f"{reverse('api-stock-batch')}?{batch}"],
+        }
+
+        header = f"{'endpoint':<18} {'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+        self.stdout.write(header)
+        for concurrency in options['concurrency']:
+            for name, paths in endpoints.items():
+                urls = [base + paths[i % len(paths)] for i in range(options['requests'])]
+                result = run_load(urls, cookie, concurrency)
+                self.stdout.write(
+                    f"{name:<18} {concurrency:>8} {result['throughput_rps']:>9} {result['p50_ms']:>9} "
+                    f"{result['p95_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}"
+                )
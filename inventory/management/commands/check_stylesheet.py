@@ -0,0 +1,58 @@
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+TEMPLATE_CLASS = re.compile(r'class\s*=\s*"([^"]*)"')
+PYTHON_CLASS = re.compile(r'''attrs\[['"]class['"]\]\s*=\s*f?(['"])(.*?)\1''')
+SCRIPT_CLASS = re.compile(r'''className\s*=\s*(['"])(.*?)\1''')
+TEMPLATE_SYNTAX = re.compile(r'\{%.*?%\}|\{\{.*?\}\}')
+CSS_CLASS = re.compile(r'\.((?:\\.|[\w-])+)')
+
+
+def used_classes(base_dir):
+    """Map each class name used in templates, scripts and form widgets to the files using it."""
+    sources = [(path, TEMPLATE_CLASS, 1) for path in Path(base_dir, 'templates').rglob('*.html')]
+    for path in Path(base_dir, 'static', 'js').rglob('*.js'):
+        sources += [(path, TEMPLATE_CLASS, 1), (path, SCRIPT_CLASS, 2)]
+    for pattern in ('*/forms.py', '*/views.py'):
+        sources += [(path, PYTHON_CLASS, 2) for path in Path(base_dir).glob(pattern)]
+
+    used = defaultdict(set)
+    for path, pattern, group in sources:
+        for match in pattern.finditer(path.read_text()):
+            # Keep the literal text of every {% if %} branch, drop the tags.
+            value = TEMPLATE_SYNTAX.sub(' ', match.group(group))
+            for name in value.split():
+                if '{' not in name:
+                    used[name].add(str(path.relative_to(base_dir)))
+    return used
+
+
+def defined_classes(css):
+    return {name.replace('\\', '') for name in CSS_CLASS.findall(css)}
+
+
+class Command(BaseCommand):
+    help = 'Verify the compiled stylesheet defines every class used in templates, scripts and forms.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stylesheet', default='css/app.css', help='Static path of the built CSS.')
+
+    def handle(self, *args, **options):
+        path = finders.find(options['stylesheet'])
+        if not path:
+            raise CommandError(f'{options["stylesheet"]} not found; run `npm run build:css` first.')
+        defined = defined_classes(Path(path).read_text())
+        used = used_classes(settings.BASE_DIR)
+        missing = sorted(name for name in used if name not in defined)
+        if missing:
+            lines = [f'  {name} ({", ".join(sorted(used[name]))})' for name in missing]
+            raise CommandError(
+                'Classes missing from the stylesheet; rebuild it with `npm run build:css`:\n'
+                + '\n'.join(lines)
+            )
+        self.stdout.write(self.style.SUCCESS(f'All {len(used)} classes are defined in {options["stylesheet"]}.'))
@@ -0,0 +1,47 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.importing import ImportFormatError, ProductImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import products from a CSV or XLSX file, upserting by SKU.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-create-missing',
+            action='store_true',
+            help='Reject rows naming unknown categories or suppliers instead of creating them.',
+        )
+        parser.add_argument('--report', help='Write the per-row error report to this JSON file.')
+
+    def handle(self, *args, **options):
+        importer = ProductImporter(
+            chunk_size=options['chunk_size'],
+            create_missing=not options['no_create_missing'],
+        )
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                report = importer.run(read_rows(fileobj, options['path']))
+        except (OSError, ImportFormatError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        if options['report']:
+            with open(options['report'], 'w') as fileobj:
+                json.dump(report.as_dict(), fileobj, indent=2)
+        for error in report.errors[:20]:
+            self.stderr.write(f"Row {error['row']} ({error['sku']}): {error['error']}")
+        if len(report.errors) > 20:
+            self.stderr.write(f'... and {len(report.errors) - 20} more errors.')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{report.created} created, {report.updated} updated, '
+                f'{len(report.errors)} rejected in {elapsed:.2f}s.'
+            )
+        )
@@ -0,0 +1,157 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from accounts.models import User
+
+from .bench_endpoints import percentile
+
+DEFAULT_PATHS = ('/', '/products/', '/sales/', '/api/products/', '/api/sales/')
+
+
+class ConnectionMonitor(threading.Thread):
+    """Sample Postgres session counters while the load runs.
+
+    ``pg_stat_database.sessions`` (PostgreSQL 14+) counts every session ever
+    opened, so its growth over the run is the connection churn; the peak of
+    ``pg_stat_activity`` is how many backends were open at once.
+    """
+
+    interval = 0.2
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.peak = 0
+
+    def sessions(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT sessions FROM pg_stat_database WHERE datname = current_database()')
+            return cursor.fetchone()[0]
+
+    def active(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()'
+            )
+            return cursor.fetchone()[0]
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, self.active())
+        connection.close()
+
+
+def session_cookie(username=None):
+    """A ``Cookie`` header value logged in as ``username`` (default: the first manager)."""
+    users = User.objects.filter(username=username) if username else (
+        User.objects.filter(role=User.Roles.MANAGER, is_active=True).order_by('pk')
+    )
+    user = users.first()
+    if user is None:
+        raise CommandError('No user to log in as; run seed_inventory first.')
+    client = Client()
+    client.force_login(user)
+    return f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+
+def fetch(url, cookie):
+    request = urllib.request.Request(url, headers={'Cookie': cookie})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except OSError:
+        status = None
+    return (time.perf_counter() - started) * 1000, status
+
+
+def run_load(urls, cookie, concurrency):
+    """Fetch ``urls`` from ``concurrency`` threads; return throughput and latency figures."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda url: fetch(url, cookie), urls))
+    elapsed = time.perf_counter() - started
+
+    timings = [timing for timing, status in samples if status and status < 400]
+    if not timings:
+        raise CommandError(f'All {len(samples)} requests failed; is the server running?')
+    return {
+        'requests': len(samples),
+        'errors': len(samples) - len(timings),
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'max_ms': round(max(timings), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server (e.g. gunicorn with gunicorn.conf.py) over HTTP and report '
+        'throughput, tail latency and Postgres connection churn. Run it once per configuration, '
+        'e.g. with DATABASE_POOL off and on, and compare with --compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+        parser.add_argument('--paths', nargs='*', default=list(DEFAULT_PATHS))
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests across all clients.')
+        parser.add_argument('--username', help='Account to log in as (defaults to the first manager).')
+        parser.add_argument('--label', default='run', help='Name of this run in the output.')
+        parser.add_argument('--output', help='Write the result to this JSON file.')
+        parser.add_argument('--compare', help='JSON result of an earlier run to compare against.')
+
+    def handle(self, *args, **options):
+        cookie = session_cookie(options['username'])
+        base = options['url'].rstrip('/')
+        urls = [base + options['paths'][i % len(options['paths'])] for i in range(options['requests'])]
+
+        monitor = None
+        sessions_before = None
+        if connection.vendor == 'postgresql':
+            monitor = ConnectionMonitor()
+            sessions_before = monitor.sessions()
+            monitor.start()
+        else:
+            self.stderr.write('Connection churn is only measured against PostgreSQL.')
+
+        result = {'label': options['label'], 'concurrency': options['concurrency']}
+        try:
+            result.update(run_load(urls, cookie, options['concurrency']))
+        finally:
+            if monitor is not None:
+                monitor.stopped.set()
+                monitor.join()
+        if monitor is not None:
+            result['new_connections'] = monitor.sessions() - sessions_before
+            result['peak_connections'] = monitor.peak
+
+        rows = [result]
+        if options['compare']:
+            rows.insert(0, json.loads(Path(options['compare']).read_text()))
+        columns = (
+            'label', 'requests', 'errors', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms',
+            'max_ms', 'new_connections', 'peak_connections',
+        )
+        self.stdout.write(' '.join(f'{column:>16}' for column in columns))
+        for row in rows:
+            self.stdout.write(' '.join(f"{str(row.get(column, '-')):>16}" for column in columns))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(result, indent=2) + '\n')
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.alerts import process_pending_alerts
+
+
+class Command(BaseCommand):
+    help = 'Drain the low-stock alert outbox and send batched notifications.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when idle.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when idle.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            sent = process_pending_alerts(
+                batch_size=options['batch_size'], max_attempts=options['max_attempts']
+            )
+            total += sent
+            if sent:
+                self.stdout.write(f'Delivered {sent} alert(s).')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Delivered {total} alert(s) in total.'))
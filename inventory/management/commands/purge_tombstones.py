@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete delta-sync tombstones older than SYNC_TOMBSTONE_DAYS. Schedule it daily.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = purge_tombstones(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} tombstones.'))
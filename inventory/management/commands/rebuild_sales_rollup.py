@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory.forecasting import refresh_stockout_forecast
+from inventory.rollups import rebuild_daily_rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales rollup table from raw sales.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip-forecast', action='store_true', help='Do not recompute the cached stockout forecast afterwards.'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_rollup(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rollup rows.'))
+        if not options['skip_forecast']:
+            refresh_stockout_forecast()
+            self.stdout.write(self.style.SUCCESS('Refreshed the stockout forecast.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from inventory.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Compare each product quantity with the sum of its stock movements.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Record adjustments so the ledger matches.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drift = reconcile(fix=options['fix'], batch_size=options['batch_size'])
+        for product_id, quantity, total in drift:
+            self.stdout.write(f'Product {product_id}: quantity {quantity}, ledger {total}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Every product matches its ledger.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Recorded {len(drift)} reconciliation adjustments.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} products differ from their ledger.'))
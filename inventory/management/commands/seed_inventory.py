@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from inventory.rollups import rebuild_daily_rollup
+from inventory.seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = 'Load a realistic synthetic catalog and sales history for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000)
+        parser.add_argument('--sales', type=int, default=2000000)
+        parser.add_argument('--users', type=int, default=25)
+        parser.add_argument('--categories', type=int, default=40)
+        parser.add_argument('--suppliers', type=int, default=60)
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable datasets.')
+        parser.add_argument('--tag', default='bench', help='Prefix for generated names and SKUs.')
+        parser.add_argument(
+            '--manager',
+            default='bench-manager',
+            help='Username of a manager account to create for driving the views.',
+        )
+        parser.add_argument('--password', default='bench-password')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            seed_dataset(
+                products=options['products'],
+                sales=options['sales'],
+                users=options['users'],
+                categories=options['categories'],
+                suppliers=options['suppliers'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                tag=options['tag'],
+                stdout=self.stdout,
+            )
+            if options['manager'] and not User.objects.filter(username=options['manager']).exists():
+                manager = User(username=options['manager'], role=User.Roles.MANAGER)
+                manager.set_password(options['password'])
+                manager.save()
+        rows = rebuild_daily_rollup()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Seeded in {time.perf_counter() - started:.1f}s; {rows} rollup rows rebuilt.'
+            )
+        )
@@ -0,0 +1,89 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from accounts.models import User
+from inventory.models import Category, Product, Sale
+
+
+class Command(BaseCommand):
+    help = 'Hammer a single product with parallel sales and verify stock is never oversold.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--sales-per-worker', type=int, default=25)
+        parser.add_argument('--stock', type=int, default=200)
+        parser.add_argument('--keep', action='store_true', help='Keep the generated rows afterwards.')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        category = Category.objects.create(name=f'load-test-{tag}')
+        product = Product.objects.create(
+            name=f'Load test {tag}',
+            sku=f'LOAD-{tag}',
+            category=category,
+            quantity=options['stock'],
+            price=Decimal('1.00'),
+        )
+        user = User(username=f'load-test-{tag}')
+        user.set_password(uuid.uuid4().hex)
+        user.save()
+
+        sold = []
+        rejected = []
+        errors = []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(options['workers'])
+
+        def worker():
+            start_gate.wait()
+            try:
+                for _ in range(options['sales_per_worker']):
+                    sale = Sale(product=product, sold_by=user, quantity=1, unit_price=product.price)
+                    try:
+                        sale.save()
+                    except ValidationError:
+                        with lock:
+                            rejected.append(1)
+                    except OperationalError as exc:
+                        with lock:
+                            errors.append(str(exc))
+                    else:
+                        with lock:
+                            sold.append(sale.quantity)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        recorded = Sale.objects.filter(product=product).count()
+        self.stdout.write(
+            f'{len(threads)} workers, {len(sold)} sold, {len(rejected)} rejected, '
+            f'{len(errors)} errors in {elapsed:.2f}s; final stock {product.quantity}'
+        )
+
+        if not options['keep']:
+            Sale.objects.filter(product=product).delete()
+            product.delete()
+            category.delete()
+            user.delete()
+
+        expected = options['stock'] - sum(sold)
+        if recorded != len(sold) or product.quantity != expected or expected < 0:
+            raise CommandError(
+                f'Stock mismatch: expected {expected} remaining and {len(sold)} sales, '
+                f'found {product.quantity} and {recorded}.'
+            )
+        self.stdout.write(self.style.SUCCESS('No oversell detected.'))
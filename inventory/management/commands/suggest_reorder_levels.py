@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.forecasting import ReorderForecaster, apply_reorder_levels, refresh_stockout_forecast
+
+
+class Command(BaseCommand):
+    help = 'Forecast sales velocity and suggest (or apply) reorder levels for every active product.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apply', action='store_true', help='Write the suggested reorder levels.')
+        parser.add_argument('--min-change', type=int, default=1, help='Only apply levels that move by at least this much.')
+        parser.add_argument('--lead-time', type=int, help='Supplier lead time in days.')
+        parser.add_argument('--service-level', type=float, help='Target probability of not stocking out, e.g. 0.95.')
+        parser.add_argument('--history-days', type=int)
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Products forecast per query.')
+        parser.add_argument('--show', type=int, default=10, help='Print this many suggestions with the largest change.')
+
+    def handle(self, *args, **options):
+        forecaster = ReorderForecaster(
+            history_days=options['history_days'],
+            lead_time_days=options['lead_time'],
+            service_level=options['service_level'],
+            chunk_size=options['chunk_size'],
+        )
+        started = time.perf_counter()
+        if options['apply']:
+            updated = apply_reorder_levels(forecaster, min_change=options['min_change'])
+            refresh_stockout_forecast()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'Updated {updated} reorder level(s) in {elapsed:.2f}s.'))
+            return
+
+        total = changed = 0
+        largest = []
+        for suggestion in forecaster:
+            total += 1
+            delta = suggestion.suggested_reorder_level - suggestion.reorder_level
+            if abs(delta) >= options['min_change']:
+                changed += 1
+                largest.append((abs(delta), suggestion))
+        elapsed = time.perf_counter() - started
+        largest.sort(key=lambda item: item[0], reverse=True)
+        for _, suggestion in largest[: options['show']]:
+            self.stdout.write(
+                f'product {suggestion.product_id}: {suggestion.reorder_level} -> '
+                f'{suggestion.suggested_reorder_level} ({suggestion.velocity}/day, '
+                f'{suggestion.days_until_stockout} days left)'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Forecast {total} product(s) in {elapsed:.2f}s; {changed} would change. '
+                'Re-run with --apply to write them.'
+            )
+        )
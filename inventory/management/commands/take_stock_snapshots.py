@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from inventory.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Snapshot the stock of every product that moved since the last run. '
+        'Schedule it daily, a few minutes after midnight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='ISO 8601 datetime to snapshot (default: start of today).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_datetime(options['as_of'])
+            if as_of is None or as_of.tzinfo is None:
+                raise CommandError('--as-of must be an ISO 8601 datetime with a UTC offset.')
+        try:
+            count = take_snapshots(as_of, batch_size=options['batch_size'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Snapshotted {count} products.'))
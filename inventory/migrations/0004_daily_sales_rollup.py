@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    Sale = apps.get_model('inventory', 'Sale')
+    DailySalesRollup = apps.get_model('inventory', 'DailySalesRollup')
+    totals = (
+        Sale.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'product_id', 'sold_by_id')
+        .annotate(
+            sale_count=Count('id'),
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(F('quantity') * F('unit_price')),
+        )
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create(
+        (
+            DailySalesRollup(
+                date=row['day'],
+                product_id=row['product_id'],
+                sold_by_id=row['sold_by_id'],
+                sale_count=row['sale_count'],
+                quantity=row['total_quantity'],
+                revenue=row['total_revenue'],
+            )
+            for row in totals.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sale_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.product')),
+                ('sold_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'sold_by'), name='unique_daily_sales_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
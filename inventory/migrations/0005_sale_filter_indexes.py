@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_daily_sales_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['product', 'created_at', 'id'], name='sale_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['sold_by', 'created_at', 'id'], name='sale_seller_created_idx'),
+        ),
+    ]
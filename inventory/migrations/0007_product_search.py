@@ -0,0 +1,88 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+# Search structures are vendor specific, so they are created here rather than
+# declared on the model. Keep them in step with inventory.search.
+
+POSTGRES_INDEXES = [
+    GinIndex(
+        SearchVector('name', 'sku', 'description', config='english'),
+        name='product_search_vector_idx',
+    ),
+    GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='product_name_trgm_idx'),
+    models.Index(fields=['sku'], opclasses=['varchar_pattern_ops'], name='product_sku_pattern_idx'),
+]
+
+SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE inventory_product_fts USING fts5(
+        name, sku, description,
+        content='inventory_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER inventory_product_fts_insert AFTER INSERT ON inventory_product BEGIN
+        INSERT INTO inventory_product_fts(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER inventory_product_fts_delete AFTER DELETE ON inventory_product BEGIN
+        INSERT INTO inventory_product_fts(inventory_product_fts, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER inventory_product_fts_update AFTER UPDATE OF name, sku, description
+    ON inventory_product BEGIN
+        INSERT INTO inventory_product_fts(inventory_product_fts, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+        INSERT INTO inventory_product_fts(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+    "INSERT INTO inventory_product_fts(inventory_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    'DROP TRIGGER IF EXISTS inventory_product_fts_insert',
+    'DROP TRIGGER IF EXISTS inventory_product_fts_delete',
+    'DROP TRIGGER IF EXISTS inventory_product_fts_update',
+    'DROP TABLE IF EXISTS inventory_product_fts',
+]
+
+
+def create_search_structures(apps, schema_editor):
+    Product = apps.get_model('inventory', 'Product')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in POSTGRES_INDEXES:
+            schema_editor.add_index(Product, index)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+
+
+def drop_search_structures(apps, schema_editor):
+    Product = apps.get_model('inventory', 'Product')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for index in POSTGRES_INDEXES:
+            schema_editor.remove_index(Product, index)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_structures, drop_search_structures),
+    ]
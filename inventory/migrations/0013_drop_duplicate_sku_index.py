@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+# 0007 added this next to the *_like index Django creates for the unique sku
+# column; it duplicated that index and only slowed writes. SKU prefix
+# matches use the *_like index.
+SKU_PATTERN_INDEX = models.Index(fields=['sku'], opclasses=['varchar_pattern_ops'], name='product_sku_pattern_idx')
+
+
+def drop_sku_pattern_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS product_sku_pattern_idx')
+
+
+def restore_sku_pattern_index(apps, schema_editor):
+    # Reversing 0007 drops the index by name, so put it back first.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('inventory', 'Product'), SKU_PATTERN_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sku_pattern_index, restore_sku_pattern_index),
+    ]
@@ -2,7 +2,9 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.utils import timezone
 
 
 class TimeStampedModel(models.Model):
@@ -19,6 +21,9 @@ class Category(TimeStampedModel):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='category_updated_id_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -34,6 +39,9 @@ class Supplier(TimeStampedModel):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='supplier_updated_id_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -59,6 +67,21 @@ class Product(TimeStampedModel):
     class Meta:
         ordering = ['name']
         unique_together = ('name', 'supplier')
+        indexes = [
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+            # Partial indexes are ignored by backends that do not support them.
+            models.Index(
+                fields=['name'],
+                condition=models.Q(quantity__lte=models.F('reorder_level')),
+                name='product_low_stock_idx',
+            ),
+            models.Index(
+                fields=['name'],
+                condition=models.Q(is_active=True),
+                name='product_active_name_idx',
+            ),
+        ]
         permissions = [
             ('manage_inventory', 'Can manage inventory records'),
         ]
@@ -70,6 +93,53 @@ class Product(TimeStampedModel):
     def is_low_stock(self) -> bool:
         return self.quantity <= self.reorder_level
 
+    # ``quantity`` is the running total of the product's ``StockMovement``
+    # rows. Saving a product whose quantity was changed records the
+    # difference as an adjustment; saving one whose quantity was left alone
+    # keeps the stored value rather than an out-of-date copy of it.
+    _loaded_quantity = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_quantity = instance.__dict__.get('quantity')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .ledger import record_movements
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'quantity' not in update_fields:
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(Product, instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using):
+            current = 0
+            if not adding:
+                current = (
+                    Product.objects.using(using)
+                    .select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('quantity', flat=True)
+                    .first()
+                ) or 0
+                if self.quantity == self._loaded_quantity:
+                    self.quantity = current
+            super().save(*args, **kwargs)
+            record_movements(
+                [
+                    StockMovement(
+                        product=self,
+                        kind=StockMovement.Kind.ADJUSTMENT,
+                        quantity=self.quantity - current,
+                        note='Opening balance' if adding else 'Manual adjustment',
+                    )
+                ],
+                using=using,
+            )
+        self._loaded_quantity = self.quantity
+
 
 class Sale(TimeStampedModel):
     product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='sales')
@@ -84,36 +154,327 @@ class Sale(TimeStampedModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='sale_created_id_idx'),
+            models.Index(fields=['product', 'created_at', 'id'], name='sale_product_created_idx'),
+            models.Index(fields=['sold_by', 'created_at', 'id'], name='sale_seller_created_idx'),
+        ]
+
+    # Fields whose loaded values decide how much stock and which rollup row
+    # an existing sale already accounts for.
+    TRACKED_FIELDS = ('product_id', 'sold_by_id', 'quantity', 'unit_price', 'created_at')
+    _loaded = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        data = instance.__dict__
+        if all(name in data for name in cls.TRACKED_FIELDS):
+            instance._loaded = instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        return {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
+    def _previous_state(self):
+        if self._loaded is None and self.pk:
+            self._loaded = Sale.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first()
+        return self._loaded
 
     def clean(self):
         if self.quantity is None or self.quantity <= 0:
             raise ValidationError('Quantity must be greater than zero.')
 
-
         available_stock = self.product.quantity
-        if self.pk:
-            previous = Sale.objects.filter(pk=self.pk).values('quantity').first()
-            if previous:
-                available_stock += previous['quantity']
+        previous = self._previous_state()
+        if previous and previous['product_id'] == self.product_id:
+            available_stock += previous['quantity']
         if self.quantity > available_stock:
             raise ValidationError('Not enough stock available for this sale.')
 
     def save(self, *args, **kwargs):
+        from .ledger import record_movements
+        from .rollups import apply_sale_changes
+        from .stock import apply_stock_delta
+
         self.full_clean()
+        previous = self._previous_state()
         with transaction.atomic():
-            # Calculate how much stock to deduct
-            if self.pk:
-                # Updating existing sale - calculate difference
-                previous = Sale.objects.get(pk=self.pk)
-                delta = self.quantity - previous.quantity
-            else:
-                # New sale - deduct full quantity
-                delta = self.quantity
-
-            # Update product stock
-            product = Product.objects.get(pk=self.product_id)
-            if delta > product.quantity:
-                raise ValidationError('Not enough stock available for this sale.')
-            product.quantity -= delta
-            product.save(update_fields=['quantity', 'updated_at'])
+            held = 0
+            returned = []
+            if previous and previous['product_id'] != self.product_id:
+                # The sale moved to another product: release the old claim in full.
+                apply_stock_delta(previous['product_id'], -previous['quantity'])
+                returned.append((previous['product_id'], previous['quantity']))
+            elif previous:
+                held = previous['quantity']
+            delta = self.quantity - held
+            apply_stock_delta(self.product_id, delta)
             super().save(*args, **kwargs)
+
+            if delta < 0:
+                returned.append((self.product_id, -delta))
+            movements = [
+                StockMovement(
+                    product_id=product_id,
+                    kind=StockMovement.Kind.RETURN,
+                    quantity=quantity,
+                    sale=self,
+                    created_by_id=self.sold_by_id,
+                )
+                for product_id, quantity in returned
+            ]
+            if delta > 0:
+                movements.append(StockMovement.for_sale(self, delta))
+            record_movements(movements)
+
+            changes = [(self.snapshot(), 1)]
+            if previous:
+                changes.append((previous, -1))
+            apply_sale_changes(changes)
+        self._loaded = self.snapshot()
+
+
+class DailySalesRollup(models.Model):
+    """Sales totals per day, product and seller, kept in step with ``Sale``."""
+
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_rollups')
+    sold_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+    )
+    sale_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'product', 'sold_by'],
+                name='unique_daily_sales_rollup',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.date} {self.product_id}/{self.sold_by_id}'
+
+
+class StockAlert(models.Model):
+    """Outbox entry written when a product's stock crosses its reorder level."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_alerts')
+    quantity = models.PositiveIntegerField()
+    reorder_level = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='stock_alert_pending_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.product_id} at {self.quantity}/{self.reorder_level}'
+
+
+class PurchaseOrder(TimeStampedModel):
+    """Stock ordered from a supplier; receiving it adds every line to stock at once."""
+
+    class Status(models.TextChoices):
+        OPEN = 'open', 'Open'
+        RECEIVED = 'received', 'Received'
+
+    # Beyond this, send the order as several; one receipt locks every product on it.
+    MAX_LINES = 5000
+
+    supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT, related_name='purchase_orders')
+    reference = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+    notes = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='purchase_orders',
+    )
+    received_at = models.DateTimeField(null=True, blank=True)
+    received_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='received_purchase_orders',
+    )
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='po_created_id_idx'),
+            models.Index(fields=['status', 'created_at'], name='po_status_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'PO {self.pk}' + (f' ({self.reference})' if self.reference else '')
+
+    @property
+    def is_open(self) -> bool:
+        return self.status == self.Status.OPEN
+
+
+class PurchaseOrderLine(models.Model):
+    order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='lines')
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='purchase_order_lines')
+    quantity = models.PositiveIntegerField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='unique_purchase_order_product'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.quantity} x {self.product_id}'
+
+
+class StockMovement(models.Model):
+    """One signed change to a product's stock. Rows are never updated.
+
+    ``Product.quantity`` always equals the sum of the product's movements.
+    """
+
+    class Kind(models.TextChoices):
+        SALE = 'sale', 'Sale'
+        RECEIPT = 'receipt', 'Receipt'
+        ADJUSTMENT = 'adjustment', 'Adjustment'
+        RETURN = 'return', 'Return'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    quantity = models.IntegerField()
+    sale = models.ForeignKey(
+        Sale,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements',
+    )
+    purchase_order = models.ForeignKey(
+        PurchaseOrder,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements',
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements',
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['product', 'created_at', 'id'], name='movement_product_created_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.product_id} {self.quantity:+d} ({self.kind})'
+
+    @classmethod
+    def for_sale(cls, sale, quantity):
+        return cls(
+            product_id=sale.product_id,
+            kind=cls.Kind.SALE,
+            quantity=-quantity,
+            sale=sale,
+            created_by_id=sale.sold_by_id,
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Stock movements are append-only; record a new movement instead.')
+        super().save(*args, **kwargs)
+
+
+class StockSnapshot(models.Model):
+    """A product's stock at ``taken_at``; see :func:`inventory.ledger.stock_as_of`."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    taken_at = models.DateTimeField()
+    quantity = models.IntegerField()
+
+    class Meta:
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'taken_at'], name='unique_stock_snapshot'),
+        ]
+        indexes = [
+            models.Index(fields=['taken_at'], name='stock_snapshot_taken_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.product_id} = {self.quantity} at {self.taken_at:%Y-%m-%d %H:%M}'
+
+
+class IdempotencyKey(models.Model):
+    """The stored outcome of a request made with an ``Idempotency-Key``.
+
+    Keys are unique per user and endpoint, so the lookup is a single
+    unique-index probe; see :mod:`inventory.idempotency`.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    scope = models.CharField(max_length=40)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.scope}:{self.key}'
+
+
+class Tombstone(models.Model):
+    """Marks a deleted catalog row so delta sync can tell clients to drop it."""
+
+    class Kind(models.TextChoices):
+        CATEGORY = 'category', 'Category'
+        SUPPLIER = 'supplier', 'Supplier'
+        PRODUCT = 'product', 'Product'
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_id_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.kind} {self.object_id}'
@@ -0,0 +1,99 @@
+"""Keyset pagination for the inventory API and list views."""
+
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination ordered on an indexed, unique-ending column tuple.
+
+    Viewsets pick their ordering with ``cursor_ordering``; it should match a
+    database index so each page is a single index range scan.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("name", "id")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+
+class SearchResultsPagination(PageNumberPagination):
+    """Page-number pagination that keeps the relevance order of search results."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, pk)`` for a cursor, or None when it is malformed."""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+class KeysetPage:
+    """One page of a queryset walked newest-first on ``(created_at, id)``.
+
+    ``after`` moves to older rows and ``before`` back to newer ones; each page
+    is a single range scan on the ``(…, created_at, id)`` indexes.
+    """
+
+    def __init__(self, queryset, page_size, after=None, before=None):
+        self.page_size = page_size
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+
+        if before:
+            created_at, pk = before
+            rows = list(
+                queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+                .order_by("created_at", "id")[: page_size + 1]
+            )
+            self.has_previous = len(rows) > page_size
+            self.has_next = True
+            rows = rows[:page_size][::-1]
+        else:
+            if after:
+                created_at, pk = after
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+            rows = list(queryset.order_by("-created_at", "-id")[: page_size + 1])
+            self.has_previous = after is not None
+            self.has_next = len(rows) > page_size
+            rows = rows[:page_size]
+
+        self.object_list = rows
+        self.has_other_pages = self.has_next or self.has_previous
+        self.next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk) if rows and self.has_next else None
+        self.previous_cursor = (
+            encode_cursor(rows[0].created_at, rows[0].pk) if rows and self.has_previous else None
+        )
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
@@ -0,0 +1,90 @@
+"""Incremental maintenance of :class:`~inventory.models.DailySalesRollup`."""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .forecasting import invalidate_stockout_forecast
+from .models import DailySalesRollup, Sale
+
+
+def apply_sale_changes(changes):
+    """Fold ``(sale snapshot, sign)`` pairs into the rollup table.
+
+    A sign of ``1`` adds a sale and ``-1`` removes it; an edit is the old
+    snapshot removed plus the new one added, which nets out on a shared row.
+    """
+    totals = defaultdict(lambda: [0, 0, Decimal('0')])
+    for state, sign in changes:
+        key = (
+            timezone.localdate(state['created_at']),
+            state['product_id'],
+            state['sold_by_id'],
+        )
+        row = totals[key]
+        row[0] += sign
+        row[1] += sign * state['quantity']
+        row[2] += sign * state['quantity'] * state['unit_price']
+
+    for (day, product_id, sold_by_id), (count, quantity, revenue) in totals.items():
+        if count or quantity or revenue:
+            _apply(day, product_id, sold_by_id, count, quantity, revenue)
+
+
+def _apply(day, product_id, sold_by_id, count, quantity, revenue):
+    rows = DailySalesRollup.objects.filter(date=day, product_id=product_id, sold_by_id=sold_by_id)
+    increments = {
+        'sale_count': F('sale_count') + count,
+        'quantity': F('quantity') + quantity,
+        'revenue': F('revenue') + revenue,
+    }
+    # Only additions create rows; removing a sale the rollup never saw (or
+    # whose seller is being cascade-deleted) must not resurrect one.
+    if rows.update(**increments) or count <= 0:
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(
+                date=day,
+                product_id=product_id,
+                sold_by_id=sold_by_id,
+                sale_count=count,
+                quantity=quantity,
+                revenue=revenue,
+            )
+    except IntegrityError:
+        rows.update(**increments)
+
+
+def rebuild_daily_rollup(batch_size=1000):
+    """Recompute the whole rollup table from ``Sale``; returns the row count."""
+    totals = (
+        Sale.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'product_id', 'sold_by_id')
+        .annotate(
+            sale_count=Count('id'),
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(F('quantity') * F('unit_price')),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        rows = (
+            DailySalesRollup(
+                date=row['day'],
+                product_id=row['product_id'],
+                sold_by_id=row['sold_by_id'],
+                sale_count=row['sale_count'],
+                quantity=row['total_quantity'],
+                revenue=row['total_revenue'],
+            )
+            for row in totals.iterator(chunk_size=batch_size)
+        )
+        created = DailySalesRollup.objects.bulk_create(rows, batch_size=batch_size)
+        invalidate_stockout_forecast()
+    return len(created)
@@ -0,0 +1,106 @@
+"""Pluggable product search.
+
+The backend is chosen from ``settings.PRODUCT_SEARCH_BACKEND`` when set, and
+otherwise from the database vendor: ranked full-text plus trigram matching on
+PostgreSQL, the FTS5 index on SQLite, and plain ``icontains`` anywhere else.
+Every backend also matches SKUs by exact prefix.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+BACKENDS_BY_VENDOR = {
+    'postgresql': 'inventory.search.PostgresSearchBackend',
+    'sqlite': 'inventory.search.SQLiteSearchBackend',
+}
+
+
+def get_search_backend():
+    path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None) or BACKENDS_BY_VENDOR.get(
+        connection.vendor, 'inventory.search.SimpleSearchBackend'
+    )
+    return import_string(path)()
+
+
+def search_products(queryset, term):
+    """Filter ``queryset`` to products matching ``term``, best matches first."""
+    term = term.strip()
+    if not term:
+        return queryset
+    return get_search_backend().search(queryset, term)
+
+
+def sku_prefix_match(term):
+    return Case(When(sku__startswith=term, then=Value(1)), default=Value(0), output_field=IntegerField())
+
+
+class SimpleSearchBackend:
+    def search(self, queryset, term):
+        return (
+            queryset.filter(
+                Q(name__icontains=term) | Q(sku__startswith=term) | Q(description__icontains=term)
+            )
+            .annotate(sku_match=sku_prefix_match(term))
+            .order_by('-sku_match', 'name', 'id')
+        )
+
+
+class PostgresSearchBackend:
+    # Must match the expression index created in migration 0007.
+    config = 'english'
+
+    def search(self, queryset, term):
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+            TrigramSimilarity,
+        )
+
+        vector = SearchVector('name', 'sku', 'description', config=self.config)
+        query = SearchQuery(term, config=self.config, search_type='websearch')
+        return (
+            queryset.annotate(
+                document=vector,
+                rank=SearchRank(vector, query),
+                similarity=TrigramSimilarity('name', term),
+                sku_match=sku_prefix_match(term),
+            )
+            .filter(Q(document=query) | Q(name__trigram_similar=term) | Q(sku__startswith=term))
+            .order_by('-sku_match', '-rank', '-similarity', 'name', 'id')
+        )
+
+
+class SQLiteSearchBackend:
+    table = 'inventory_product_fts'
+
+    def match_expression(self, term):
+        # Quote every word so FTS5 syntax in user input is taken literally,
+        # and make each one a prefix query.
+        words = re.findall(r'\w+', term)
+        return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+    def search(self, queryset, term):
+        match = self.match_expression(term)
+        sku_match = sku_prefix_match(term)
+        if not match:
+            return queryset.filter(sku__startswith=term).annotate(sku_match=sku_match).order_by('name', 'id')
+
+        product_table = queryset.model._meta.db_table
+        matching_ids = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        # bm25() weights: name, sku, description. Lower scores are better.
+        rank = RawSQL(
+            f'SELECT bm25({self.table}, 10.0, 10.0, 1.0) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = {product_table}.id',
+            [match],
+        )
+        return (
+            queryset.filter(Q(pk__in=matching_ids) | Q(sku__startswith=term))
+            .annotate(rank=rank, sku_match=sku_match)
+            .order_by('-sku_match', 'rank', 'name', 'id')
+        )
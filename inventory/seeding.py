@@ -0,0 +1,123 @@
+"""Synthetic data generation for benchmarks and query-plan audits."""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from accounts.models import User
+from .ledger import record_opening_balances
+from .models import Category, Product, Sale, Supplier
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the ``created_at``/``updated_at`` values given to it."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_dataset(
+    *,
+    products=1000,
+    sales=20000,
+    users=10,
+    categories=20,
+    suppliers=20,
+    days=365,
+    batch_size=5000,
+    seed=0,
+    tag='seed',
+    stdout=None,
+):
+    """Bulk-load a catalog and ``days`` of sales history, bypassing ``Sale.save``.
+
+    Rollups are not maintained here; callers that need them should run
+    :func:`inventory.rollups.rebuild_daily_rollup` afterwards. Each product's
+    stock enters the ledger as an opening balance dated now, so the seeded
+    sales history is not part of it.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    with explicit_timestamps(Category, Supplier, Product, Sale):
+        category_rows = Category.objects.bulk_create(
+            Category(name=f'{tag} category {index}', created_at=now, updated_at=now)
+            for index in range(categories)
+        )
+        supplier_rows = Supplier.objects.bulk_create(
+            Supplier(name=f'{tag} supplier {index}', created_at=now, updated_at=now)
+            for index in range(suppliers)
+        )
+        # One hash shared by every seeded account; User.save rejects unusable passwords.
+        password = make_password(f'{tag}-password')
+        user_ids = [
+            user.pk
+            for user in User.objects.bulk_create(
+                User(username=f'{tag}-user-{index}', password=password) for index in range(users)
+            )
+        ]
+        log(f'Created {categories} categories, {suppliers} suppliers, {users} users.')
+
+        product_prices = []
+        for start in range(0, products, batch_size):
+            batch = []
+            for index in range(start, min(start + batch_size, products)):
+                price = Decimal(rng.randint(100, 50000)) / 100
+                batch.append(
+                    Product(
+                        name=f'{tag} product {index}',
+                        sku=f'{tag.upper()}-{index:08d}',
+                        category=rng.choice(category_rows),
+                        supplier=rng.choice(supplier_rows),
+                        description=f'Synthetic product {index}.',
+                        quantity=rng.randint(0, 500),
+                        reorder_level=rng.randint(5, 15),
+                        price=price,
+                        is_active=rng.random() > 0.05,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            rows = Product.objects.bulk_create(batch)
+            record_opening_balances(rows)
+            product_prices.extend((row.pk, row.price) for row in rows)
+        log(f'Created {products} products.')
+
+        span = days * 24 * 3600
+        for start in range(0, sales, batch_size):
+            batch = []
+            for _ in range(start, min(start + batch_size, sales)):
+                product_id, price = rng.choice(product_prices)
+                created_at = now - timedelta(seconds=rng.randint(0, span))
+                batch.append(
+                    Sale(
+                        product_id=product_id,
+                        sold_by_id=rng.choice(user_ids),
+                        quantity=rng.randint(1, 5),
+                        unit_price=price,
+                        created_at=created_at,
+                        updated_at=created_at,
+                    )
+                )
+            Sale.objects.bulk_create(batch)
+            log(f'Created {min(start + batch_size, sales)}/{sales} sales.')
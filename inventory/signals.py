@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import bump_data_version
+from .events import publish_sale, publish_stock
+from .models import Category, Product, Sale, Supplier, Tombstone
+from .rollups import apply_sale_changes
+
+
+@receiver(post_delete, sender=Sale)
+def remove_sale_from_rollup(sender, instance, **kwargs):
+    apply_sale_changes([(instance._loaded or instance.snapshot(), -1)])
+
+
+@receiver(post_save, sender=Product)
+def broadcast_product_stock(sender, instance, **kwargs):
+    # Sale-driven stock changes are published by inventory.stock.
+    publish_stock(instance)
+
+
+@receiver(post_save, sender=Sale)
+def broadcast_sale(sender, instance, created, **kwargs):
+    # Dashboards add each event to their running totals, so an edit must not
+    # be sent again; it reaches them with the next widget refresh.
+    if created:
+        publish_sale(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Sale)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Sale)
+@receiver(post_delete, sender=Supplier)
+def invalidate_dashboard_widgets(sender, **kwargs):
+    bump_data_version()
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Product)
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(kind=sender._meta.model_name, object_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Supplier)
+def touch_supplied_products(sender, instance, **kwargs):
+    # Deleting a supplier nulls Product.supplier with a plain UPDATE; bump
+    # updated_at first so delta sync sends those products again.
+    Product.objects.filter(supplier=instance).update(updated_at=timezone.now())
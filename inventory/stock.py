@@ -0,0 +1,195 @@
+"""Contention-safe adjustments to ``Product.quantity``.
+
+Single stock changes go through :func:`apply_stock_delta`, which issues one
+conditional ``UPDATE ... SET quantity = quantity - delta WHERE quantity >= delta``.
+The database takes the row lock for the duration of that statement, so
+concurrent checkouts can neither lose updates nor oversell. Batches
+(:func:`record_sales_bulk`, :func:`receive_purchase_order`) lock their
+products in primary-key order and write them with one ``bulk_update``.
+
+Callers pair each adjustment with a ``StockMovement`` in the same
+transaction; see :mod:`inventory.ledger`.
+"""
+
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+# Lock timeouts and deadlocks surface as OperationalError; they are retried a
+# few times with a short linear backoff before giving up.
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 0.02
+
+
+class InsufficientStock(ValidationError):
+    """Raised when a product does not have enough stock for a deduction."""
+
+
+def apply_stock_delta(product_id, delta, *, using=None):
+    """Deduct ``delta`` units from a product, or return stock when negative.
+
+    The deduction is a single statement conditional on enough stock being on
+    hand; :class:`InsufficientStock` is raised when that condition fails.
+    """
+    from .alerts import record_crossings
+    from .events import publish_stock
+    from .models import Product
+
+    if not delta:
+        return
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            # A savepoint keeps the caller's transaction usable for a retry.
+            with transaction.atomic(using=using):
+                updated = (
+                    Product.objects.using(using)
+                    .filter(pk=product_id, quantity__gte=delta)
+                    .update(quantity=F('quantity') - delta, updated_at=timezone.now())
+                )
+            break
+        except OperationalError:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+
+    if not updated:
+        raise InsufficientStock('Not enough stock available for this sale.')
+    product = (
+        Product.objects.using(using)
+        .only('name', 'sku', 'quantity', 'reorder_level')
+        .get(pk=product_id)
+    )
+    record_crossings([(product, product.quantity + delta <= product.reorder_level)], using=using)
+    publish_stock(product, using=using)
+
+
+def record_sales_bulk(sales, *, using=None):
+    """Insert unsaved ``Sale`` instances, reserving their stock in one pass.
+
+    The affected products are locked once, in primary-key order, and each sale
+    is checked against the stock left over by the sales before it. Returns
+    ``(created, rejected)`` where ``rejected`` maps batch indexes to messages.
+    """
+    from .alerts import record_crossings
+    from .caching import bump_data_version
+    from .events import publish_sale, publish_stock
+    from .ledger import record_movements
+    from .models import Product, Sale, StockMovement
+    from .rollups import apply_sale_changes
+
+    created = []
+    rejected = {}
+    if not sales:
+        return created, rejected
+
+    with transaction.atomic(using=using):
+        products = (
+            Product.objects.using(using)
+            .select_for_update()
+            .filter(pk__in={sale.product_id for sale in sales})
+            .order_by('pk')
+            .only('pk', 'name', 'sku', 'quantity', 'reorder_level', 'is_active')
+            .in_bulk()
+        )
+        was_low = {pk: product.is_low_stock for pk, product in products.items()}
+        for index, sale in enumerate(sales):
+            product = products.get(sale.product_id)
+            if product is None:
+                rejected[index] = 'Product does not exist.'
+            elif not product.is_active:
+                rejected[index] = 'Product is not active.'
+            elif sale.quantity > product.quantity:
+                rejected[index] = 'Not enough stock available for this sale.'
+            else:
+                product.quantity -= sale.quantity
+                created.append(sale)
+
+        if created:
+            now = timezone.now()
+            touched = {sale.product_id for sale in created}
+            changed = [product for pk, product in products.items() if pk in touched]
+            for product in changed:
+                product.updated_at = now
+            Product.objects.using(using).bulk_update(changed, ['quantity', 'updated_at'])
+            record_crossings([(product, was_low[product.pk]) for product in changed], using=using)
+            created = Sale.objects.using(using).bulk_create(created)
+            record_movements([StockMovement.for_sale(sale, sale.quantity) for sale in created], using=using)
+            for sale in created:
+                sale._loaded = sale.snapshot()
+            apply_sale_changes([(sale._loaded, 1) for sale in created])
+            # bulk_create and bulk_update send no model signals.
+            bump_data_version()
+            for product in changed:
+                publish_stock(product, using=using)
+            for sale in created:
+                sale.product = products[sale.product_id]
+                publish_sale(sale, using=using)
+
+    return created, rejected
+
+
+class PurchaseOrderNotOpen(ValidationError):
+    """Raised when receiving an order that was already received."""
+
+
+def receive_purchase_order(order_id, *, user=None, using=None):
+    """Add every line of an open purchase order to stock in one transaction.
+
+    The products are locked in primary-key order, then all increments go out
+    as ``quantity = quantity + n`` through a single ``bulk_update``, so sales
+    running meanwhile are neither lost nor blocked for longer than the receipt.
+    """
+    from .caching import bump_data_version
+    from .events import publish_stock
+    from .ledger import record_movements
+    from .models import Product, PurchaseOrder, PurchaseOrderLine, StockMovement
+
+    with transaction.atomic(using=using):
+        order = PurchaseOrder.objects.using(using).select_for_update().get(pk=order_id)
+        if not order.is_open:
+            raise PurchaseOrderNotOpen(f'{order} has already been received.')
+        increments = dict(
+            PurchaseOrderLine.objects.using(using).filter(order=order).values_list('product_id', 'quantity')
+        )
+        product_ids = list(
+            Product.objects.using(using)
+            .select_for_update()
+            .filter(pk__in=increments)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        now = timezone.now()
+        Product.objects.using(using).bulk_update(
+            [Product(pk=pk, quantity=F('quantity') + increments[pk], updated_at=now) for pk in product_ids],
+            ['quantity', 'updated_at'],
+        )
+        record_movements(
+            [
+                StockMovement(
+                    product_id=pk,
+                    kind=StockMovement.Kind.RECEIPT,
+                    quantity=increments[pk],
+                    purchase_order=order,
+                    created_by=user,
+                    note=f'Received {order}',
+                    created_at=now,
+                )
+                for pk in product_ids
+            ],
+            using=using,
+        )
+        order.status = PurchaseOrder.Status.RECEIVED
+        order.received_at = now
+        order.received_by = user
+        order.save(update_fields=['status', 'received_at', 'received_by', 'updated_at'])
+
+        # bulk_update sends no model signals.
+        bump_data_version()
+        received = Product.objects.using(using).filter(pk__in=product_ids).only('name', 'sku', 'quantity', 'reorder_level')
+        for product in received:
+            publish_stock(product, using=using)
+    return order
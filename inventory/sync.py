@@ -0,0 +1,137 @@
+"""Delta sync of the catalog for offline clients such as POS terminals.
+
+Changes are read as four streams: categories, suppliers, products (by
+``updated_at``) and tombstones for deleted rows (by ``deleted_at``). Every
+change has a position ``(timestamp, stream, id)``. A sync token is the
+opaque encoding of the last position the client has seen, so each page is
+one ``(updated_at, id)`` index range scan per stream. It also records when
+it was issued: a client that has not synced for longer than tombstones are
+kept may have missed deletes and must start over.
+
+Rows are stamped when they are written, not when they commit. Changes
+newer than ``SYNC_SETTLE_SECONDS`` are held back until later syncs, so a
+slow transaction cannot commit behind a token that was already handed out.
+Sync always reads the primary: a lagging replica would hide changes that
+the token then moves past.
+"""
+
+import base64
+import binascii
+import heapq
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Product, Supplier, Tombstone
+
+TOKEN_VERSION = 1
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ExpiredToken(ValueError):
+    """Tombstones the client may need are gone; it must sync from scratch."""
+
+
+class Stream:
+    def __init__(self, name, queryset, timestamp_field):
+        self.name = name
+        self.queryset = queryset
+        self.timestamp_field = timestamp_field
+
+
+def streams():
+    # Parents come before children at the same timestamp.
+    return [
+        Stream('categories', Category.objects.all(), 'updated_at'),
+        Stream('suppliers', Supplier.objects.all(), 'updated_at'),
+        Stream('products', Product.objects.select_related('category', 'supplier'), 'updated_at'),
+        Stream('deleted', Tombstone.objects.all(), 'deleted_at'),
+    ]
+
+
+def encode_token(position, issued_at):
+    timestamp, stream, pk = position
+    raw = json.dumps([TOKEN_VERSION, timestamp.isoformat(), stream, pk, issued_at.isoformat()])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_token(token):
+    """Return ``((timestamp, stream, pk), issued_at)``; raise :class:`InvalidToken` if malformed."""
+    try:
+        version, timestamp, stream, pk, issued_at = json.loads(base64.urlsafe_b64decode(token.encode()))
+        timestamp = parse_datetime(timestamp)
+        issued_at = parse_datetime(issued_at)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidToken('Malformed sync token.')
+    if (
+        version != TOKEN_VERSION
+        or timestamp is None
+        or issued_at is None
+        or not isinstance(stream, int)
+        or not isinstance(pk, int)
+    ):
+        raise InvalidToken('Malformed sync token.')
+    return (timestamp, stream, pk), issued_at
+
+
+def tombstone_cutoff():
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+
+
+def changes_since(token=None, limit=500):
+    """Return ``(changes, next_token, has_more)``.
+
+    ``changes`` is a list of ``(stream name, instance)`` in position order.
+    Without a token every row is returned, which is a full initial sync.
+    """
+    horizon = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    position = None
+    if token:
+        position, issued_at = decode_token(token)
+        if issued_at < tombstone_cutoff():
+            raise ExpiredToken('This sync token is too old; sync again from scratch.')
+
+    pages = []
+    all_streams = streams()
+    for index, stream in enumerate(all_streams):
+        field = stream.timestamp_field
+        queryset = stream.queryset.using(DEFAULT_DB_ALIAS).filter(**{f'{field}__lte': horizon})
+        if position is not None:
+            after, after_stream, after_pk = position
+            if index > after_stream:
+                queryset = queryset.filter(**{f'{field}__gte': after})
+            elif index == after_stream:
+                queryset = queryset.filter(Q(**{f'{field}__gt': after}) | Q(**{field: after, 'pk__gt': after_pk}))
+            else:
+                queryset = queryset.filter(**{f'{field}__gt': after})
+        rows = queryset.order_by(field, 'pk')[: limit + 1]
+        pages.append([(getattr(row, field), index, row.pk, row) for row in rows])
+
+    merged = list(heapq.merge(*pages, key=lambda change: change[:3]))
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    if has_more:
+        next_token = encode_token(merged[-1][:3], horizon)
+    else:
+        # Caught up: everything up to the horizon has been delivered.
+        next_token = encode_token((horizon, len(all_streams), 0), horizon)
+    return [(all_streams[index].name, row) for _, index, _, row in merged], next_token, has_more
+
+
+def purge_tombstones(batch_size=5000):
+    """Delete tombstones older than ``SYNC_TOMBSTONE_DAYS``; return how many."""
+    deleted = 0
+    expired = Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff())
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += Tombstone.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,449 @@
+import threading
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+
+from .alerts import MemoryNotifier, process_pending_alerts, record_crossings
+from .api import ProductViewSet
+from .events import MemoryBroker
+from .forecasting import ReorderSuggestion, apply_reorder_levels
+from .forms import PurchaseOrderForm
+from .management.commands.audit_query_plans import hot_queries, plan_problems
+from .models import Category, Product, PurchaseOrder, Sale, StockAlert, StockMovement, Supplier
+from .rollups import rebuild_daily_rollup
+from .search import search_products
+from .seeding import seed_dataset
+from .views import id_param
+
+
+class FailingNotifier:
+    def __init__(self):
+        self.calls = 0
+
+    def send(self, alerts):
+        self.calls += 1
+        raise ConnectionError('notifier is down')
+
+
+@override_settings(STOCK_ALERT_NOTIFIERS=['inventory.alerts.MemoryNotifier'])
+class StockAlertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clerk', password='clerk-password')
+        cls.category = Category.objects.create(name='Filters')
+
+    def setUp(self):
+        MemoryNotifier.batches.clear()
+        self.product = Product.objects.create(
+            name='Oil filter',
+            sku='OF-1',
+            category=self.category,
+            quantity=10,
+            reorder_level=5,
+            price=Decimal('4.00'),
+        )
+
+    def sell(self, quantity, product=None):
+        product = product or self.product
+        Sale(product=product, sold_by=self.user, quantity=quantity, unit_price=product.price).save()
+
+    def test_sale_crossing_the_reorder_level_records_one_alert(self):
+        self.sell(4)
+        self.assertFalse(StockAlert.objects.exists())
+
+        self.sell(1)
+        alert = StockAlert.objects.get()
+        self.assertEqual((alert.product, alert.quantity, alert.reorder_level), (self.product, 5, 5))
+
+        # Already below the threshold, so further sales are not new crossings.
+        self.sell(2)
+        self.assertEqual(StockAlert.objects.count(), 1)
+
+    def test_raising_the_reorder_level_counts_as_a_crossing(self):
+        was_low_stock = self.product.is_low_stock
+        self.product.reorder_level = 12
+        self.product.save()
+        record_crossings([(self.product, was_low_stock)])
+        self.assertEqual(StockAlert.objects.get().reorder_level, 12)
+
+    def test_applied_reorder_levels_judge_crossings_on_current_stock(self):
+        # Forecast while the product had 10 in stock, then sell it down to 7.
+        suggestion = ReorderSuggestion(
+            product_id=self.product.pk,
+            quantity=10,
+            reorder_level=5,
+            moving_average=1.0,
+            velocity=1.0,
+            safety_stock=0.0,
+            suggested_reorder_level=8,
+            days_until_stockout=10.0,
+        )
+        self.sell(3)
+        self.assertEqual(apply_reorder_levels([suggestion]), 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reorder_level, 8)
+        alert = StockAlert.objects.get()
+        self.assertEqual((alert.quantity, alert.reorder_level), (7, 8))
+
+    def test_worker_drains_pending_alerts_in_batches(self):
+        others = [
+            Product.objects.create(
+                name=f'Air filter {index}',
+                sku=f'AF-{index}',
+                category=self.category,
+                quantity=6,
+                price=Decimal('9.00'),
+            )
+            for index in range(2)
+        ]
+        for product in [self.product, *others]:
+            self.sell(6, product)
+
+        self.assertEqual(process_pending_alerts(batch_size=2), 2)
+        self.assertEqual(process_pending_alerts(batch_size=2), 1)
+        self.assertEqual(process_pending_alerts(batch_size=2), 0)
+
+        self.assertEqual([len(batch) for batch in MemoryNotifier.batches], [2, 1])
+        delivered = [item['sku'] for batch in MemoryNotifier.batches for item in batch]
+        self.assertCountEqual(delivered, ['OF-1', 'AF-0', 'AF-1'])
+        self.assertFalse(StockAlert.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(set(StockAlert.objects.values_list('attempts', flat=True)), {1})
+
+    def test_failed_delivery_is_retried_up_to_max_attempts(self):
+        self.sell(6)
+        failing = FailingNotifier()
+        with self.assertLogs('inventory.alerts', 'ERROR'):
+            for _ in range(3):
+                self.assertEqual(process_pending_alerts(max_attempts=3, notifiers=[failing]), 0)
+        self.assertEqual(failing.calls, 3)
+
+        alert = StockAlert.objects.get()
+        self.assertEqual(alert.attempts, 3)
+        self.assertIsNone(alert.processed_at)
+
+        # Out of attempts: the alert is left alone, even once delivery works again.
+        self.assertEqual(process_pending_alerts(max_attempts=3), 0)
+        self.assertEqual(failing.calls, 3)
+        self.assertEqual(MemoryNotifier.batches, [])
+
+    def test_alert_delivered_after_a_transient_failure(self):
+        self.sell(6)
+        with self.assertLogs('inventory.alerts', 'ERROR'):
+            process_pending_alerts(notifiers=[FailingNotifier()])
+        self.assertEqual(process_pending_alerts(), 1)
+
+        alert = StockAlert.objects.get()
+        self.assertEqual(alert.attempts, 2)
+        self.assertIsNotNone(alert.processed_at)
+        self.assertEqual(MemoryNotifier.batches[0][0]['quantity'], 4)
+
+
+class SaleEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clerk', password='clerk-password')
+        cls.product = Product.objects.create(
+            name='Spark plug',
+            sku='SP-1',
+            category=Category.objects.create(name='Ignition'),
+            quantity=20,
+            price=Decimal('3.50'),
+        )
+
+    def setUp(self):
+        broker = MemoryBroker()
+        patcher = mock.patch('inventory.events._broker', broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.subscription = broker.subscribe()
+
+    def sale_events(self):
+        return [event['data'] for event in self.subscription.get(0) if event['event'] == 'sale']
+
+    def test_only_new_sales_are_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = Sale(product=self.product, sold_by=self.user, quantity=2, unit_price=self.product.price)
+            sale.save()
+        self.assertEqual([event['id'] for event in self.sale_events()], [sale.pk])
+
+        # Live totals add every sale event, so an edit must not be sent again.
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.quantity = 3
+            sale.save()
+        self.assertEqual(self.sale_events(), [])
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(products=200, sales=2000, tag='plans')
+        rebuild_daily_rollup()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_hot_queries_use_indexes_without_sorting(self):
+        queries = hot_queries()
+        self.assertIn('sales list by product', [label for label, _ in queries])
+        for label, queryset in queries:
+            with self.subTest(label):
+                self.assertEqual(plan_problems(queryset.explain(), connection.vendor), [])
+
+
+class SaleFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clerk', password='clerk-password')
+        product = Product.objects.create(
+            name='Brake pad',
+            sku='BP-1',
+            category=Category.objects.create(name='Brakes'),
+            quantity=10,
+            price=Decimal('12.00'),
+        )
+        Sale(product=product, sold_by=cls.user, quantity=1, unit_price=product.price).save()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_id_param(self):
+        self.assertEqual(id_param('42'), 42)
+        self.assertEqual(id_param(42), 42)
+        for value in (None, '', 'abc', '-1', '0', '٣', str(2**63)):
+            with self.subTest(value=value):
+                self.assertIsNone(id_param(value))
+
+    def test_invalid_filters_are_ignored(self):
+        for query in ({'product': 'abc'}, {'user': 'abc'}, {'start': '2024-02-30', 'end': 'soon'}):
+            with self.subTest(query):
+                response = self.client.get(reverse('sale-list'), query)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Brake pad')
+
+                response = self.client.get(reverse('sale-export'), query)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b'Brake pad', b''.join(response.streaming_content))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 fallback search')
+@override_settings(PRODUCT_SEARCH_BACKEND='inventory.search.SQLiteSearchBackend')
+class SQLiteSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Brakes')
+
+        def product(name, sku, description=''):
+            return Product.objects.create(
+                name=name, sku=sku, description=description, category=category, price=Decimal('10.00')
+            )
+
+        cls.pad = product('Ceramic brake pad', 'CBP-100')
+        cls.caliper = product('Caliper bolt', 'CB-7', 'Fits most brake calipers')
+        cls.rotor = product('Vented rotor', 'VR-2')
+
+    def search(self, term):
+        return list(search_products(Product.objects.all(), term))
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('brake'), [self.pad, self.caliper])
+
+    def test_words_and_skus_match_by_prefix(self):
+        self.assertEqual(self.search('cera'), [self.pad])
+        self.assertEqual(self.search('vent rot'), [self.rotor])
+        self.assertEqual(self.search('CBP'), [self.pad])
+        self.assertEqual(self.search('CB-7'), [self.caliper])
+
+    def test_index_follows_renames_and_deletes(self):
+        self.rotor.name = 'Slotted disc'
+        self.rotor.save()
+        self.assertEqual(self.search('vented'), [])
+        self.assertEqual(self.search('slotted'), [self.rotor])
+
+        self.pad.delete()
+        self.assertEqual(self.search('ceramic'), [])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clerk', password='clerk-password')
+        cls.product = Product.objects.create(
+            name='Wiper blade',
+            sku='WB-1',
+            category=Category.objects.create(name='Wipers'),
+            quantity=8,
+            price=Decimal('6.00'),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.urls = [reverse('api-product-list'), reverse('api-product-detail', args=[self.product.pk])]
+
+    def test_matching_etag_returns_304_without_serializing(self):
+        for url in self.urls:
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+                with mock.patch.object(ProductViewSet, 'get_serializer') as get_serializer:
+                    response = self.client.get(url, headers={'If-None-Match': response['ETag']})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                get_serializer.assert_not_called()
+
+    def test_product_update_changes_the_etag(self):
+        for url in self.urls:
+            with self.subTest(url):
+                etag = self.client.get(url)['ETag']
+                self.product.quantity -= 1
+                self.product.save()
+
+                response = self.client.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+
+class ConcurrentSaleTests(TransactionTestCase):
+    """Sales racing each other for the last units of a product."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('clerk', password='clerk-password')
+        self.product = Product.objects.create(
+            name='Fuel pump',
+            sku='FP-1',
+            category=Category.objects.create(name='Fuel'),
+            quantity=5,
+            price=Decimal('80.00'),
+        )
+
+    def sell_concurrently(self, workers):
+        outcomes = []
+        barrier = threading.Barrier(workers)
+
+        def sell():
+            barrier.wait()
+            try:
+                while True:
+                    # A fresh instance per attempt: a rolled-back insert can leave a pk behind.
+                    sale = Sale(product=self.product, sold_by=self.user, quantity=1, unit_price=Decimal('80.00'))
+                    try:
+                        sale.save()
+                        outcomes.append('sold')
+                        return
+                    except ValidationError:
+                        outcomes.append('rejected')
+                        return
+                    except OperationalError:
+                        # SQLite has no row locks; a busy database is retried.
+                        continue
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=sell) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_sales_never_oversell(self):
+        outcomes = self.sell_concurrently(12)
+
+        self.assertEqual(sorted(outcomes), ['rejected'] * 7 + ['sold'] * 5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(Sale.objects.filter(product=self.product).count(), 5)
+        ledger = StockMovement.objects.filter(product=self.product).values_list('quantity', flat=True)
+        self.assertEqual(sum(ledger), 0)
+
+    def test_api_rejects_a_sale_without_enough_stock(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('api-sale-list'),
+            {'product': self.product.pk, 'quantity': 6, 'unit_price': '80.00'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['Not enough stock available for this sale.']})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+
+class BulkSaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clerk', password='clerk-password')
+        category = Category.objects.create(name='Lighting')
+        cls.bulb = Product.objects.create(
+            name='Headlight bulb', sku='HB-1', category=category, quantity=10, price=Decimal('7.00')
+        )
+        cls.retired = Product.objects.create(
+            name='Halogen bulb', sku='HB-0', category=category, quantity=10, price=Decimal('5.00'), is_active=False
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def test_empty_batch_is_rejected(self):
+        response = self.post(reverse('api-sale-bulk'), [])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['Expected a non-empty list of sales.']})
+
+    def test_inactive_products_are_rejected_like_single_sales(self):
+        item = {'product': self.retired.pk, 'quantity': 1, 'unit_price': '5.00'}
+        response = self.post(reverse('api-sale-list'), item)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'product': ['Product is not active.']})
+
+        response = self.post(
+            reverse('api-sale-bulk'), [{'product': self.bulb.pk, 'quantity': 2, 'unit_price': '7.00'}, item]
+        )
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual([sale['product'] for sale in body['created']], [self.bulb.pk])
+        self.assertEqual(body['errors'], [{'index': 1, 'errors': {'non_field_errors': ['Product is not active.']}}])
+        self.retired.refresh_from_db()
+        self.assertEqual(self.retired.quantity, 10)
+
+
+class PurchaseOrderFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier = Supplier.objects.create(name='Parts Co')
+        category = Category.objects.create(name='Belts')
+        for sku in ('TB-1', 'TB-2'):
+            Product.objects.create(name=f'Timing belt {sku}', sku=sku, category=category, price=Decimal('30.00'))
+
+    def form(self, lines, instance=None):
+        return PurchaseOrderForm({'supplier': self.supplier.pk, 'lines': lines}, instance=instance)
+
+    def test_save_writes_the_lines(self):
+        order = self.form('TB-1, 4, 12.50\nTB-2, 2').save()
+        self.assertEqual(
+            sorted(order.lines.values_list('product__sku', 'quantity', 'unit_cost')),
+            [('TB-1', 4, Decimal('12.50')), ('TB-2', 2, Decimal('0.00'))],
+        )
+
+        self.form('TB-2, 6', instance=order).save()
+        self.assertEqual(list(order.lines.values_list('product__sku', 'quantity')), [('TB-2', 6)])
+
+    def test_commit_false_defers_the_lines_to_save_m2m(self):
+        form = self.form('TB-1, 4')
+        self.assertTrue(form.is_valid())
+        order = form.save(commit=False)
+        self.assertIsNone(order.pk)
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+        order.reference = 'PO-77'
+        order.save()
+        form.save_m2m()
+        self.assertEqual(list(order.lines.values_list('product__sku', 'quantity')), [('TB-1', 4)])
@@ -6,6 +6,8 @@ urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
     path('analytics/', views.ManagerAnalyticsView.as_view(), name='analytics'),
     path('products/', views.ProductListView.as_view(), name='product-list'),
+    path('products/autocomplete/', views.ProductAutocompleteView.as_view(), name='product-autocomplete'),
+    path('products/export/', views.ProductExportView.as_view(), name='product-export'),
     path('products/create/', views.ProductCreateView.as_view(), name='product-create'),
     path('products/<int:pk>/edit/', views.ProductUpdateView.as_view(), name='product-edit'),
     path('products/<int:pk>/delete/', views.ProductDeleteView.as_view(), name='product-delete'),
@@ -13,12 +15,21 @@ urlpatterns = [
     path('suppliers/create/', views.SupplierCreateView.as_view(), name='supplier-create'),
     path('suppliers/<int:pk>/edit/', views.SupplierUpdateView.as_view(), name='supplier-edit'),
     path('suppliers/<int:pk>/delete/', views.SupplierDeleteView.as_view(), name='supplier-delete'),
+    path('purchase-orders/', views.PurchaseOrderListView.as_view(), name='purchase-order-list'),
+    path('purchase-orders/create/', views.PurchaseOrderCreateView.as_view(), name='purchase-order-create'),
+    path('purchase-orders/<int:pk>/', views.PurchaseOrderDetailView.as_view(), name='purchase-order-detail'),
+    path('purchase-orders/<int:pk>/edit/', views.PurchaseOrderUpdateView.as_view(), name='purchase-order-edit'),
+    path('purchase-orders/<int:pk>/delete/', views.PurchaseOrderDeleteView.as_view(), name='purchase-order-delete'),
+    path('purchase-orders/<int:pk>/receive/', views.PurchaseOrderReceiveView.as_view(), name='purchase-order-receive'),
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
     path('categories/create/', views.CategoryCreateView.as_view(), name='category-create'),
     path('categories/<int:pk>/edit/', views.CategoryUpdateView.as_view(), name='category-edit'),
     path('categories/<int:pk>/delete/', views.CategoryDeleteView.as_view(), name='category-delete'),
     path('sales/', views.SaleListView.as_view(), name='sale-list'),
+    path('sales/export/', views.SaleExportView.as_view(), name='sale-export'),
     path('sales/create/', views.SaleCreateView.as_view(), name='sale-create'),
+    path('events/stock/', views.StockEventStreamView.as_view(), name='stock-events'),
+    path('users/autocomplete/', views.UserAutocompleteView.as_view(), name='user-autocomplete'),
 ]
 
 
@@ -1,15 +1,28 @@
-from datetime import timedelta
-
+import csv
+import json
+import uuid
+from datetime import datetime, time, timedelta
+from functools import partial
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, F, Sum
-from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views import View
 from django.views.generic import (
     CreateView,
     DeleteView,
+    DetailView,
     ListView,
     TemplateView,
     UpdateView,
@@ -17,29 +30,82 @@ from django.views.generic import (
 
 from accounts.mixins import RolePermissionRequiredMixin
 
-from .forms import CategoryForm, ProductForm, SaleForm, SupplierForm
-from .models import Category, Product, Sale, Supplier
+from .alerts import record_crossings
+from .caching import cached_widget, rows_fragment_key
+from .conditional import collection_validators, conditional_response
+from .events import aiter_sse, get_broker, iter_sse, streaming_enabled
+from .forecasting import cached_stockout_forecast
+from .forms import CategoryForm, ProductForm, PurchaseOrderForm, SaleForm, SupplierForm
+from .idempotency import MAX_KEY_LENGTH, IdempotencyKeyReused, fingerprint, request_key, run_once
+from .models import Category, DailySalesRollup, Product, PurchaseOrder, Sale, Supplier
+from .pagination import KeysetPage
+from .search import search_products
+from .stock import PurchaseOrderNotOpen, receive_purchase_order
 
 User = get_user_model()
 
 
+def revenue_last_30_days():
+    return DailySalesRollup.objects.filter(
+        date__gte=timezone.localdate() - timedelta(days=30)
+    ).aggregate(total=Sum('revenue'))['total'] or 0
+
+
+def low_stock_products():
+    return Product.objects.filter(quantity__lte=F('reorder_level'))
+
+
+class ConditionalListMixin:
+    """Answer an unchanged list page with 304 before querying or rendering its rows.
+
+    The page header shows the user's name and role-dependent links, so the
+    tag covers those too. Pages carrying flash messages are always rendered.
+    """
+
+    validator_dependencies = ()
+
+    def validator_variant(self):
+        user = self.request.user
+        return (
+            self.request.get_full_path(),
+            user.pk,
+            user.role,
+            user.is_superuser,
+            user.get_short_name() or user.get_username(),
+        )
+
+    def get(self, request, *args, **kwargs):
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = collection_validators(
+            self.get_queryset(), self.validator_dependencies, self.validator_variant()
+        )
+        render = partial(super().get, request, *args, **kwargs)
+        return conditional_response(request, etag, last_modified, render)
+
+
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'inventory/dashboard.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        products = Product.objects.all()
-        low_stock = products.filter(quantity__lte=F('reorder_level'))
         recent_sales = Sale.objects.filter(created_at__gte=timezone.now() - timedelta(days=30))
-        revenue = recent_sales.aggregate(total=Sum(F('quantity') * F('unit_price')))['total'] or 0
 
         context.update(
             {
-                'total_products': products.count(),
-                'low_stock_count': low_stock.count(),
-                'low_stock_products': low_stock[:5],
-                'recent_sales': recent_sales.select_related('product', 'sold_by')[:5],
-                'revenue_last_30_days': revenue,
+                'total_products': cached_widget('total_products', Product.objects.count),
+                'low_stock_count': cached_widget(
+                    'low_stock_count', lambda: low_stock_products().count()
+                ),
+                'low_stock_products': cached_widget(
+                    'low_stock_products', lambda: list(low_stock_products()[:5])
+                ),
+                'recent_sales': cached_widget(
+                    'recent_sales',
+                    lambda: list(recent_sales.select_related('product', 'sold_by')[:5]),
+                ),
+                'revenue_last_30_days': cached_widget('revenue_last_30_days', revenue_last_30_days),
+                'live_stock': streaming_enabled(self.request),
             }
         )
         return context
@@ -53,68 +119,78 @@ class ManagerAnalyticsView(LoginRequiredMixin, RolePermissionRequiredMixin, Temp
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        products = Product.objects.all()
-        suppliers = Supplier.objects.all()
-        sales = Sale.objects.all()
-
-        last_30_days = timezone.now() - timedelta(days=30)
-        recent_sales = sales.filter(created_at__gte=last_30_days)
-        revenue_30 = recent_sales.aggregate(
-            total=Sum(F("quantity") * F("unit_price"))
-        )["total"] or 0
-
-        low_stock = products.filter(quantity__lte=F("reorder_level"))
+        rollups = DailySalesRollup.objects.all()
+        recent_rollups = rollups.filter(date__gte=timezone.localdate() - timedelta(days=30))
 
         top_products = (
-            recent_sales.values("product__name")
+            recent_rollups.values("product__name")
             .annotate(total_qty=Sum("quantity"))
             .order_by("-total_qty")[:5]
         )
 
         sales_by_user = (
-            recent_sales.values("sold_by__username")
+            recent_rollups.values("sold_by__username")
             .annotate(
-                total_sales=Count("id"),
-                total_revenue=Sum(F("quantity") * F("unit_price")),
+                total_sales=Sum("sale_count"),
+                total_revenue=Sum("revenue"),
             )
             .order_by("-total_revenue")
         )
 
         context.update(
             {
-                "total_products": products.count(),
-                "total_suppliers": suppliers.count(),
-                "total_sales": sales.count(),
-                "revenue_last_30_days": revenue_30,
-                "low_stock_count": low_stock.count(),
-                "top_products": top_products,
-                "sales_by_user": sales_by_user,
+                "total_products": cached_widget("total_products", Product.objects.count),
+                "total_suppliers": cached_widget("total_suppliers", Supplier.objects.count),
+                "total_sales": cached_widget(
+                    "total_sales",
+                    lambda: rollups.aggregate(total=Sum("sale_count"))["total"] or 0,
+                ),
+                "revenue_last_30_days": cached_widget("revenue_last_30_days", revenue_last_30_days),
+                "low_stock_count": cached_widget(
+                    "low_stock_count", lambda: low_stock_products().count()
+                ),
+                "top_products": cached_widget("top_products", lambda: list(top_products)),
+                "sales_by_user": cached_widget("sales_by_user", lambda: list(sales_by_user)),
+                "stockout_forecast": cached_stockout_forecast(),
             }
         )
         return context
 
 
-class ProductListView(LoginRequiredMixin, ListView):
+class ProductListView(LoginRequiredMixin, ConditionalListMixin, ListView):
     model = Product
     paginate_by = 20
     template_name = 'inventory/product_list.html'
     context_object_name = 'products'
+    # Row names and the category filter dropdown.
+    validator_dependencies = (Category, Supplier)
 
     def get_queryset(self):
         queryset = Product.objects.select_related('category', 'supplier')
         search = self.request.GET.get('search')
-        category = self.request.GET.get('category')
+        category = id_param(self.request.GET.get('category'))
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset = search_products(queryset, search)
         if category:
             queryset = queryset.filter(category_id=category)
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['rows_key'] = rows_fragment_key(
+            context['products'],
+            lambda product: (
+                product.pk,
+                product.updated_at,
+                product.category.updated_at,
+                product.supplier and product.supplier.updated_at,
+            ),
+        )
+        context['fragment_timeout'] = settings.FRAGMENT_CACHE_TIMEOUT
         context['categories'] = Category.objects.all()
         context['selected_category'] = self.request.GET.get('category', '')
         context['search'] = self.request.GET.get('search', '')
+        context['live_stock'] = streaming_enabled(self.request)
         return context
 
 
@@ -137,8 +213,14 @@ class ProductUpdateView(LoginRequiredMixin, RolePermissionRequiredMixin, UpdateV
     success_url = reverse_lazy('product-list')
     
     def form_valid(self, form):
+        with transaction.atomic():
+            response = super().form_valid(form)
+            before = Product(
+                quantity=form.initial['quantity'], reorder_level=form.initial['reorder_level']
+            )
+            record_crossings([(self.object, before.is_low_stock)])
         messages.success(self.request, 'Product updated successfully.')
-        return super().form_valid(form)
+        return response
 
 
 class ProductDeleteView(LoginRequiredMixin, RolePermissionRequiredMixin, DeleteView):
@@ -152,7 +234,7 @@ class ProductDeleteView(LoginRequiredMixin, RolePermissionRequiredMixin, DeleteV
         return super().delete(request, *args, **kwargs)
 
 
-class SupplierListView(LoginRequiredMixin, ListView):
+class SupplierListView(LoginRequiredMixin, ConditionalListMixin, ListView):
     model = Supplier
     template_name = 'inventory/supplier_list.html'
     context_object_name = 'suppliers'
@@ -192,7 +274,96 @@ class SupplierDeleteView(LoginRequiredMixin, RolePermissionRequiredMixin, Delete
         return super().delete(request, *args, **kwargs)
 
 
-class CategoryListView(LoginRequiredMixin, RolePermissionRequiredMixin, ListView):
+class PurchaseOrderListView(LoginRequiredMixin, RolePermissionRequiredMixin, ListView):
+    permission_required = 'inventory.manage_inventory'
+    model = PurchaseOrder
+    paginate_by = 50
+    template_name = 'inventory/purchase_order_list.html'
+    context_object_name = 'orders'
+
+    def get_queryset(self):
+        return (
+            PurchaseOrder.objects.select_related('supplier')
+            .annotate(line_count=Count('lines'))
+            .order_by('-created_at', '-id')
+        )
+
+
+class PurchaseOrderDetailView(LoginRequiredMixin, RolePermissionRequiredMixin, DetailView):
+    permission_required = 'inventory.manage_inventory'
+    model = PurchaseOrder
+    template_name = 'inventory/purchase_order_detail.html'
+    context_object_name = 'order'
+
+    def get_queryset(self):
+        return PurchaseOrder.objects.select_related('supplier', 'created_by', 'received_by')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['lines'] = self.object.lines.select_related('product')
+        return context
+
+
+class PurchaseOrderCreateView(LoginRequiredMixin, RolePermissionRequiredMixin, CreateView):
+    permission_required = 'inventory.manage_inventory'
+    form_class = PurchaseOrderForm
+    template_name = 'inventory/purchase_order_form.html'
+
+    def form_valid(self, form):
+        form.instance.created_by = self.request.user
+        messages.success(self.request, 'Purchase order created.')
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse('purchase-order-detail', args=[self.object.pk])
+
+
+class PurchaseOrderUpdateView(LoginRequiredMixin, RolePermissionRequiredMixin, UpdateView):
+    permission_required = 'inventory.manage_inventory'
+    form_class = PurchaseOrderForm
+    template_name = 'inventory/purchase_order_form.html'
+
+    def get_queryset(self):
+        # Received orders are part of the stock history and stay as they were.
+        return PurchaseOrder.objects.filter(status=PurchaseOrder.Status.OPEN)
+
+    def form_valid(self, form):
+        messages.success(self.request, 'Purchase order updated.')
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse('purchase-order-detail', args=[self.object.pk])
+
+
+class PurchaseOrderDeleteView(LoginRequiredMixin, RolePermissionRequiredMixin, DeleteView):
+    permission_required = 'inventory.manage_inventory'
+    template_name = 'inventory/confirm_delete.html'
+    success_url = reverse_lazy('purchase-order-list')
+
+    def get_queryset(self):
+        return PurchaseOrder.objects.filter(status=PurchaseOrder.Status.OPEN)
+
+    def form_valid(self, form):
+        messages.info(self.request, 'Purchase order removed.')
+        return super().form_valid(form)
+
+
+class PurchaseOrderReceiveView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
+    permission_required = 'inventory.manage_inventory'
+    http_method_names = ['post']
+
+    def post(self, request, pk):
+        order = get_object_or_404(PurchaseOrder, pk=pk)
+        try:
+            receive_purchase_order(order.pk, user=request.user)
+        except PurchaseOrderNotOpen as exc:
+            messages.error(request, exc.messages[0])
+        else:
+            messages.success(request, f'{order} received; stock updated.')
+        return redirect('purchase-order-detail', pk=order.pk)
+
+
+class CategoryListView(LoginRequiredMixin, RolePermissionRequiredMixin, ConditionalListMixin, ListView):
     permission_required = 'inventory.manage_inventory'
     model = Category
     template_name = 'inventory/category_list.html'
@@ -235,45 +406,304 @@ class CategoryDeleteView(LoginRequiredMixin, RolePermissionRequiredMixin, Delete
         return super().delete(request, *args, **kwargs)
 
 
+MAX_ID = 2**63 - 1
+
+
+def id_param(value):
+    """Return a query-string id (or an int) as an int, or None if it is not a valid id."""
+    value = '' if value is None else str(value)
+    if value.isascii() and value.isdigit() and 0 < int(value) <= MAX_ID:
+        return int(value)
+    return None
+
+
+def day_start(value):
+    """Return the aware local midnight that opens an ISO ``YYYY-MM-DD`` day, or None."""
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        # Well-formed but impossible, e.g. 2024-02-30.
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def product_label(name, sku):
+    # Names are only unique per supplier, so the SKU tells products apart.
+    return f'{name} ({sku})'
+
+
+def filter_sales(queryset, params):
+    """Apply the product/user/date filters shared by the sales list and exports.
+
+    Dates become half-open ``[start, end + 1 day)`` timestamp ranges so the
+    filters stay sargable on the ``(…, created_at, id)`` indexes.
+    """
+    product_id = id_param(params.get('product'))
+    user_id = id_param(params.get('user'))
+    start = day_start(params.get('start'))
+    end = day_start(params.get('end'))
+    if product_id:
+        queryset = queryset.filter(product_id=product_id)
+    if user_id:
+        queryset = queryset.filter(sold_by_id=user_id)
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lt=end + timedelta(days=1))
+    return queryset
+
+
 class SaleListView(LoginRequiredMixin, ListView):
     model = Sale
+    paginate_by = 50
+    max_paginate_by = 200
     template_name = 'inventory/sale_list.html'
     context_object_name = 'sales'
 
+    def get_paginate_by(self, queryset):
+        page_size = self.request.GET.get('page_size', '')
+        if page_size.isascii() and page_size.isdigit() and int(page_size) > 0:
+            return min(int(page_size), self.max_paginate_by)
+        return self.paginate_by
+
     def get_queryset(self):
-        queryset = Sale.objects.select_related('product', 'sold_by')
-        product_id = self.request.GET.get('product')
-        user_id = self.request.GET.get('user')
-        start = self.request.GET.get('start')
-        end = self.request.GET.get('end')
-        if product_id:
-            queryset = queryset.filter(product_id=product_id)
-        if user_id:
-            queryset = queryset.filter(sold_by_id=user_id)
-        if start:
-            queryset = queryset.filter(created_at__date__gte=start)
-        if end:
-            queryset = queryset.filter(created_at__date__lte=end)
-        return queryset
+        return filter_sales(Sale.objects.select_related('product', 'sold_by'), self.request.GET)
+
+    def paginate_queryset(self, queryset, page_size):
+        page = KeysetPage(
+            queryset,
+            page_size,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return None, page, page.object_list, page.has_other_pages
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['products'] = Product.objects.all()
-        context['users'] = User.objects.all()
-        context['filters'] = self.request.GET
+        filters = self.request.GET.copy()
+        filters.pop('after', None)
+        filters.pop('before', None)
+        page = context['page_obj']
+        if page.next_cursor:
+            context['next_query'] = urlencode({**filters.dict(), 'after': page.next_cursor})
+        if page.previous_cursor:
+            context['previous_query'] = urlencode({**filters.dict(), 'before': page.previous_cursor})
+
+        product_id = id_param(filters.get('product'))
+        user_id = id_param(filters.get('user'))
+        product = Product.objects.filter(pk=product_id).values_list('name', 'sku').first() if product_id else None
+        context['selected_product'] = product_label(*product) if product else None
+        context['selected_user'] = (
+            User.objects.filter(pk=user_id).values_list('username', flat=True).first() if user_id else None
+        )
+        context['filters'] = filters
+        context['rows_key'] = rows_fragment_key(
+            context['sales'],
+            lambda sale: (
+                sale.pk,
+                sale.updated_at,
+                sale.product.updated_at,
+                sale.sold_by.username,
+                sale.sold_by.first_name,
+            ),
+        )
+        context['fragment_timeout'] = settings.FRAGMENT_CACHE_TIMEOUT
         return context
 
 
+class Echo:
+    """File-like object whose ``write`` hands the value back to ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+class StreamingExportView(LoginRequiredMixin, View):
+    """Stream a queryset as CSV (default) or NDJSON with flat memory use.
+
+    Subclasses list ``(header, lookup)`` pairs in ``columns``; rows are read
+    with ``values_list`` in server-side chunks, never as model instances.
+    """
+
+    columns = ()
+    filename = 'export'
+    chunk_size = 2000
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_rows(self):
+        lookups = [lookup for _, lookup in self.columns]
+        return self.get_queryset().values_list(*lookups).iterator(chunk_size=self.chunk_size)
+
+    def stream_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow([header for header, _ in self.columns])
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, rows):
+        headers = [header for header, _ in self.columns]
+        for row in rows:
+            yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('format') == 'ndjson':
+            content, content_type, extension = self.stream_ndjson(self.get_rows()), 'application/x-ndjson', 'ndjson'
+        else:
+            content, content_type, extension = self.stream_csv(self.get_rows()), 'text/csv', 'csv'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.{extension}"'
+        return response
+
+
+class SaleExportView(StreamingExportView):
+    filename = 'sales'
+    columns = (
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('product_id', 'product_id'),
+        ('product', 'product__name'),
+        ('sku', 'product__sku'),
+        ('quantity', 'quantity'),
+        ('unit_price', 'unit_price'),
+        ('sold_by', 'sold_by__username'),
+        ('notes', 'notes'),
+    )
+
+    def get_queryset(self):
+        return filter_sales(Sale.objects.all(), self.request.GET).order_by('-created_at', '-id')
+
+
+class ProductExportView(StreamingExportView):
+    filename = 'products'
+    columns = (
+        ('id', 'id'),
+        ('sku', 'sku'),
+        ('name', 'name'),
+        ('category', 'category__name'),
+        ('supplier', 'supplier__name'),
+        ('quantity', 'quantity'),
+        ('reorder_level', 'reorder_level'),
+        ('price', 'price'),
+        ('is_active', 'is_active'),
+        ('description', 'description'),
+    )
+
+    def get_queryset(self):
+        queryset = Product.objects.order_by('name', 'id')
+        category = id_param(self.request.GET.get('category'))
+        if category:
+            queryset = queryset.filter(category_id=category)
+        return queryset
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    """JSON ``{"results": [{"id", "label"}]}`` for a prefix typed in ``?q=``."""
+
+    limit = 20
+
+    def get_choices(self, term):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get('q', '').strip()
+        results = [
+            {'id': pk, 'label': label}
+            for pk, label in self.get_choices(term)[: self.limit]
+        ]
+        return JsonResponse({'results': results})
+
+
+class ProductAutocompleteView(AutocompleteView):
+    def get_choices(self, term):
+        queryset = Product.objects.all()
+        if term:
+            queryset = queryset.filter(Q(name__istartswith=term) | Q(sku__istartswith=term))
+        rows = queryset.order_by('name', 'id').values_list('id', 'name', 'sku')[: self.limit]
+        return [(pk, product_label(name, sku)) for pk, name, sku in rows]
+
+
+class UserAutocompleteView(AutocompleteView):
+    def get_choices(self, term):
+        queryset = User.objects.all()
+        if term:
+            queryset = queryset.filter(username__istartswith=term)
+        return queryset.order_by('username').values_list('id', 'username')
+
+
+class StockEventStreamView(LoginRequiredMixin, View):
+    """Server-sent events carrying stock and sale changes as they commit.
+
+    Under ASGI the stream is an async generator and holds no thread while
+    idle. Under WSGI it would occupy a worker thread, so it is refused with
+    204, which tells EventSource to stop reconnecting, unless
+    ``EVENT_STREAM_WSGI`` is set. Streams end after
+    ``EVENT_STREAM_MAX_SECONDS`` and the browser reconnects.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not streaming_enabled(request):
+            return HttpResponse(status=204)
+        subscription = get_broker().subscribe()
+        if isinstance(request, ASGIRequest):
+            content = aiter_sse(subscription)
+        else:
+            content = iter_sse(subscription)
+        response = StreamingHttpResponse(content, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies such as nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class SaleCreateView(LoginRequiredMixin, CreateView):
     template_name = 'inventory/sale_form.html'
     form_class = SaleForm
     success_url = reverse_lazy('sale-list')
+    # Each rendered form carries a key, so a double submit or a resend after
+    # a dropped connection records the sale once.
+    idempotency_field = 'idempotency_key'
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs['user'] = self.request.user
         return kwargs
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['idempotency_key'] = request_key(self.request, self.idempotency_field) or uuid.uuid4().hex
+        return context
+
+    def post(self, request, *args, **kwargs):
+        key = request_key(request, self.idempotency_field)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return super().post(request, *args, **kwargs)
+        submitted = sorted(
+            (name, values)
+            for name, values in request.POST.lists()
+            if name not in ('csrfmiddlewaretoken', self.idempotency_field)
+        )
+        try:
+            return run_once(
+                request.user,
+                'sale-form',
+                key,
+                fingerprint(submitted),
+                partial(super().post, request, *args, **kwargs),
+                serialize=lambda response: {'location': response.url} if response.status_code == 302 else None,
+                replay=self.replay,
+            )
+        except IdempotencyKeyReused:
+            messages.error(request, 'That form was already submitted with different details. Please enter the sale again.')
+            return redirect('sale-create')
+
+    def replay(self, record):
+        messages.info(self.request, 'This sale was already recorded.')
+        return redirect(record.response['location'])
+
     def form_valid(self, form):
         sale = form.save(commit=False)
         sale.sold_by = self.request.user
@@ -0,0 +1,223 @@
+"""Per-request SQL instrumentation, read-replica routing and static files.
+
+A sampled fraction of requests runs with an ``execute_wrapper`` on every
+database connection. The wrapper counts queries, total database time and
+repeated statements. The results go out as a ``Server-Timing`` header and
+a structured log line. Statements slower than ``SLOW_QUERY_THRESHOLD_MS``
+are also logged with the call site that issued them.
+
+``ReplicaRoutingMiddleware`` marks which requests may read from replicas;
+see ``myproject.routers``. Every middleware here runs natively under both
+WSGI and ASGI so async views are not funnelled through a worker thread.
+"""
+
+import json
+import logging
+import random
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .routers import begin_request, end_request, replica_aliases
+
+logger = logging.getLogger('myproject.requests')
+slow_query_logger = logging.getLogger('myproject.slow_queries')
+
+
+def _call_site():
+    """Return the innermost stack frames that belong to the project, not libraries."""
+    base = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(base) and 'site-packages' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames[-5:]))
+
+
+class QueryStats:
+    def __init__(self, slow_threshold_ms=None):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.statements[(sql, repr(params))] += 1
+            if self.slow_threshold_ms is not None and elapsed * 1000 >= self.slow_threshold_ms:
+                slow_query_logger.warning(
+                    'Slow query (%.1f ms): %s\n%s', elapsed * 1000, sql, _call_site()
+                )
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI.
+
+    Under ASGI, a sync-only middleware forces every request through a thread
+    hop; subclasses implement ``handle`` and ``ahandle`` instead.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+class QueryTimingMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        self.slow_threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def instrument(self):
+        stats = QueryStats(self.slow_threshold_ms)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield stats
+
+    def handle(self, request):
+        if not self.sampled():
+            return self.get_response(request)
+        with self.instrument() as stats:
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def ahandle(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with self.instrument() as stats:
+            response = await self.get_response(request)
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.duration * 1000
+
+        response['Server-Timing'] = ', '.join(
+            [
+                f'db;dur={db_ms:.1f};desc="{stats.count} queries"',
+                f'dup;desc="{stats.duplicates} duplicate queries"',
+                f'app;dur={total_ms - db_ms:.1f}',
+                f'total;dur={total_ms:.1f}',
+            ]
+        )
+        logger.info(
+            json.dumps(
+                {
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'total_ms': round(total_ms, 2),
+                    'db_ms': round(db_ms, 2),
+                    'queries': stats.count,
+                    'duplicate_queries': stats.duplicates,
+                }
+            )
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """Route safe requests to replicas unless the client wrote recently.
+
+    A request that writes sets a short-lived cookie. Until the cookie
+    expires, that client reads from the primary and sees its own writes
+    despite replication lag.
+    """
+
+    cookie_name = 'primary_pin'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = bool(replica_aliases())
+        self.pin_seconds = settings.REPLICA_PIN_SECONDS
+
+    def begin(self, request):
+        pinned = self.cookie_name in request.COOKIES
+        return begin_request(request.method in self.safe_methods and not pinned)
+
+    def finish(self, request, response, state):
+        if state.wrote or request.method not in self.safe_methods:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def handle(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        state, token = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, state)
+
+    async def ahandle(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        state, token = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, state)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, able to sit in an async middleware chain without a thread hop."""
+
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return super().__call__(request)
+
+    async def ahandle(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,115 @@
+"""Read-replica routing.
+
+Replicas are configured with ``DATABASE_REPLICA_URLS`` and registered as
+``replica_0``, ``replica_1``, ... Reads go to a replica only while
+``ReplicaRoutingMiddleware`` marks the current request as eligible. That
+means a safe method, and a client that has not written within
+``REPLICA_PIN_SECONDS``. Everything else uses ``default``: writes,
+management commands, and reads inside a transaction on the primary.
+
+A replica that fails its health check is skipped for
+``REPLICA_HEALTH_CHECK_INTERVAL`` seconds. With no healthy replica, reads
+fall back to the primary.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('myproject.routers')
+
+
+class RoutingState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def begin_request(use_replica):
+    """Start routing for one request; returns a token for :func:`end_request`."""
+    state = RoutingState(use_replica)
+    return state, _state.set(state)
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+class ReplicaHealth:
+    """Process-wide record of which replicas answered their last check."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(alias)
+            if checked and now - checked[0] < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+                return checked[1]
+            # Claim the check so concurrent requests reuse the last verdict meanwhile.
+            self._checked[alias] = (now, checked[1] if checked else True)
+        healthy = self.check(alias)
+        with self._lock:
+            self._checked[alias] = (time.monotonic(), healthy)
+        return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            connection.close_if_unusable_or_obsolete()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except DatabaseError:
+            logger.warning('Replica %s failed its health check; reading from the primary.', alias)
+            connection.close()
+            return False
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+
+health = ReplicaHealth()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        candidates = replica_aliases()
+        random.shuffle(candidates)
+        for alias in candidates:
+            if health.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith('replica_')
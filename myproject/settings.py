@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
+    'django.contrib.postgres',
     'rest_framework',
     'accounts',
     'inventory',
@@ -30,7 +31,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'myproject.middleware.QueryTimingMiddleware',
+    'myproject.middleware.ReplicaRoutingMiddleware',
+    'myproject.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,15 +59,183 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # Compile each template once per process rather than on every render.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        (
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        ),
+    ]
+
 WSGI_APPLICATION = 'myproject.wsgi.application'
 
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Connections are either persistent per thread (CONN_MAX_AGE, verified before
+# reuse by CONN_HEALTH_CHECKS) or, with DATABASE_POOL on Postgres, borrowed
+# from a psycopg pool per worker process. Size the pool to the worker's
+# thread count; see gunicorn.conf.py.
+DATABASE_CONN_MAX_AGE = int(os.getenv('DATABASE_CONN_MAX_AGE', '600'))
+DATABASE_POOL = os.getenv('DATABASE_POOL', 'False').lower() == 'true'
+DATABASE_POOL_MIN_SIZE = int(os.getenv('DATABASE_POOL_MIN_SIZE', '1'))
+DATABASE_POOL_MAX_SIZE = int(os.getenv('DATABASE_POOL_MAX_SIZE', os.getenv('GUNICORN_THREADS', '4')))
+DATABASE_POOL_TIMEOUT = float(os.getenv('DATABASE_POOL_TIMEOUT', '10'))
+DATABASE_POOL_MAX_IDLE = float(os.getenv('DATABASE_POOL_MAX_IDLE', '300'))
+
+# 'asgi' when gunicorn serves myproject.asgi (see gunicorn.conf.py).
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi').lower()
+
+
+def database_config(url):
+    config = dj_database_url.parse(
+        url, conn_max_age=DATABASE_CONN_MAX_AGE, conn_health_checks=True
+    )
+    if DATABASE_POOL and config['ENGINE'] == 'django.db.backends.postgresql':
+        # Django returns pooled connections after each request and refuses
+        # persistent connections on top of a pool. CONN_HEALTH_CHECKS makes
+        # the pool test each connection as it is handed out, so ones the
+        # server or a proxy dropped while idle are replaced.
+        config['CONN_MAX_AGE'] = 0
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DATABASE_POOL_MIN_SIZE,
+            'max_size': DATABASE_POOL_MAX_SIZE,
+            'timeout': DATABASE_POOL_TIMEOUT,
+            'max_idle': DATABASE_POOL_MAX_IDLE,
+        }
+    elif SERVER_INTERFACE == 'asgi':
+        # Each ASGI request runs in a fresh context, so a persistent
+        # connection is never reused and they pile up until the server
+        # refuses more. Use DATABASE_POOL to reuse connections under ASGI.
+        config['CONN_MAX_AGE'] = 0
+    return config
+
+
 DATABASES = {
-    'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+    'default': database_config(DATABASE_URL)
+}
+
+# Optional read replicas, comma-separated. Safe-method requests read from
+# them (see myproject.routers); after a write the client stays on the
+# primary for REPLICA_PIN_SECONDS so it reads its own writes.
+DATABASE_REPLICA_URLS = [url for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url]
+for index, url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f'replica_{index}'] = database_config(url)
+    DATABASES[f'replica_{index}']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['myproject.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+REPLICA_HEALTH_CHECK_INTERVAL = int(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', '30'))
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Upper bound on how long a dashboard widget may lag behind the clock; data
+# changes invalidate widgets immediately regardless.
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '300'))
+
+# Rendered table fragments are keyed on the rows they show, so this only
+# bounds how long unused fragments occupy the cache.
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '600'))
+
+# Fraction of requests instrumented by QueryTimingMiddleware, and the
+# duration above which a statement is logged with its call site.
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', '1.0' if DEBUG else '0.05')
+)
+SLOW_QUERY_THRESHOLD_MS = (
+    float(os.getenv('SLOW_QUERY_THRESHOLD_MS')) if os.getenv('SLOW_QUERY_THRESHOLD_MS') else None
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'myproject.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'myproject.slow_queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
+# Reorder forecasting (inventory.forecasting): days of sales history read,
+# moving-average window, smoothing factor, supplier lead time and the
+# probability of not running out during that lead time.
+REORDER_HISTORY_DAYS = int(os.getenv('REORDER_HISTORY_DAYS', '730'))
+REORDER_WINDOW_DAYS = int(os.getenv('REORDER_WINDOW_DAYS', '28'))
+REORDER_SMOOTHING_ALPHA = float(os.getenv('REORDER_SMOOTHING_ALPHA', '0.1'))
+REORDER_LEAD_TIME_DAYS = int(os.getenv('REORDER_LEAD_TIME_DAYS', '7'))
+REORDER_SERVICE_LEVEL = float(os.getenv('REORDER_SERVICE_LEVEL', '0.95'))
+REORDER_FORECAST_CACHE_TIMEOUT = int(os.getenv('REORDER_FORECAST_CACHE_TIMEOUT', '3600'))
+
+# Live stock/sales events (inventory.events). MemoryBroker only reaches
+# clients connected to the same process; with Redis every process sees
+# every write.
+EVENT_BROKER = os.getenv(
+    'EVENT_BROKER',
+    'inventory.events.RedisBroker' if REDIS_URL else 'inventory.events.MemoryBroker',
+)
+EVENT_STREAM_HEARTBEAT = int(os.getenv('EVENT_STREAM_HEARTBEAT', '15'))
+EVENT_STREAM_MAX_SECONDS = int(os.getenv('EVENT_STREAM_MAX_SECONDS', '300'))
+EVENT_STREAM_RETRY_MS = int(os.getenv('EVENT_STREAM_RETRY_MS', '2000'))
+# Under WSGI every open stream holds a worker thread, so pages only open one
+# when served over ASGI unless this is set (e.g. for runserver).
+EVENT_STREAM_WSGI = os.getenv('EVENT_STREAM_WSGI', 'False').lower() == 'true'
+
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND',
+    'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend',
+)
+
+# Low-stock alerts are written to an outbox and delivered by
+# `manage.py process_stock_alerts`; see inventory.alerts.
+STOCK_ALERT_EMAILS = [address for address in os.getenv('STOCK_ALERT_EMAILS', '').split(',') if address]
+STOCK_ALERT_WEBHOOK_URL = os.getenv('STOCK_ALERT_WEBHOOK_URL')
+STOCK_ALERT_NOTIFIERS = ['inventory.alerts.EmailNotifier']
+if STOCK_ALERT_WEBHOOK_URL:
+    STOCK_ALERT_NOTIFIERS.append('inventory.alerts.WebhookNotifier')
+
+# Sale creation honours an Idempotency-Key header (inventory.idempotency).
+# Keys are remembered this many seconds; `manage.py purge_idempotency_keys`
+# deletes older ones.
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))
+
+# Catalog delta sync (inventory.sync). Changes younger than the settle window
+# wait for a later sync so slow transactions are not skipped. Tombstones for
+# deleted rows are kept this many days (`manage.py purge_tombstones`); older
+# sync tokens must start over.
+SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', '10'))
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', '30'))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -95,8 +266,17 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# Use WhiteNoise for efficient static file serving on Heroku
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Use WhiteNoise for efficient static file serving on Heroku. Manifest storage
+# gives collected files content-hashed names that WhiteNoise serves with
+# far-future cache headers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -109,6 +289,8 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
+    "DEFAULT_PAGINATION_CLASS": "inventory.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
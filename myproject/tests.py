@@ -0,0 +1,100 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from inventory.models import Category
+
+from .middleware import ReplicaRoutingMiddleware
+from .routers import health
+
+REPLICA = 'replica_0'
+
+
+def list_categories(request):
+    """A view that reads categories and, for unsafe methods, writes one."""
+    if request.method == 'POST':
+        Category.objects.create(name=request.POST['name'])
+    return HttpResponse(','.join(Category.objects.order_by('name').values_list('name', flat=True)))
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing between the primary and a replica held in a second SQLite file.
+
+    The replica is registered for this class only and is never replicated
+    to, so the rows a request returns show which database served it.
+    """
+
+    # Resolved in setUpClass, once the replica alias exists; the test runner
+    # would reject an alias missing from the settings it starts with.
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.replica_name = str(Path(cls.directory.name, 'replica.sqlite3'))
+        # connections.settings is settings.DATABASES, so routing sees the alias too.
+        settings.DATABASES[REPLICA] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.replica_name}
+        connections.configure_settings(settings.DATABASES)
+        super().setUpClass()
+        with connections[REPLICA].schema_editor() as editor:
+            editor.create_model(Category)
+        # Flushes skip the replica (the router never migrates it), so this row stays.
+        Category.objects.using(REPLICA).create(name='from replica')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del settings.DATABASES[REPLICA]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        health.reset()
+        Category.objects.create(name='from primary')
+        self.middleware = ReplicaRoutingMiddleware(list_categories)
+        self.factory = RequestFactory()
+
+    def test_safe_requests_read_from_the_replica(self):
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'from replica')
+        self.assertNotIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.middleware(self.factory.post('/', {'name': 'new'}))
+        self.assertEqual(response.content, b'from primary,new')
+        cookie = response.cookies[ReplicaRoutingMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        request = self.factory.get('/')
+        request.COOKIES[ReplicaRoutingMiddleware.cookie_name] = cookie.value
+        self.assertEqual(self.middleware(request).content, b'from primary,new')
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        def view(request):
+            with transaction.atomic():
+                return list_categories(request)
+
+        self.assertEqual(ReplicaRoutingMiddleware(view)(self.factory.get('/')).content, b'from primary')
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        replica = connections[REPLICA]
+        replica.close()
+        # SQLite cannot create a file in a missing directory, so the health check fails.
+        replica.settings_dict['NAME'] = str(Path(self.directory.name, 'missing', 'replica.sqlite3'))
+        try:
+            with self.assertLogs('myproject.routers', 'WARNING'):
+                response = self.middleware(self.factory.get('/'))
+            self.assertEqual(response.content, b'from primary')
+            self.assertFalse(health.is_healthy(REPLICA))
+        finally:
+            replica.settings_dict['NAME'] = self.replica_name
+
+        # The verdict is kept until the check interval passes.
+        self.assertEqual(self.middleware(self.factory.get('/')).content, b'from primary')
+        with override_settings(REPLICA_HEALTH_CHECK_INTERVAL=0):
+            self.assertEqual(self.middleware(self.factory.get('/')).content, b'from replica')
@@ -0,0 +1,97 @@
+// Patch stock figures and recent sales in place from the server-sent event
+// stream, so pages stay current without reloading. Markup opts in with:
+//   [data-live-stock="<stream url>"]     somewhere on the page
+//   [data-product-id] [data-stock-quantity]  rows/cells showing stock
+//   [data-low-stock-list] [data-recent-sales]  dashboard lists
+(function () {
+    var root = document.querySelector('[data-live-stock]');
+    if (!root || !window.EventSource) {
+        return;
+    }
+
+    function listLimit(list) {
+        return parseInt(list.dataset.limit || '5', 10);
+    }
+
+    function trim(list) {
+        var items = list.querySelectorAll('li[data-product-id], li[data-sale-id]');
+        for (var i = listLimit(list); i < items.length; i++) {
+            items[i].remove();
+        }
+        var empty = list.querySelector('[data-empty]');
+        if (empty) {
+            empty.hidden = items.length > 0;
+        }
+    }
+
+    function item(html, attribute, value) {
+        var li = document.createElement('li');
+        li.className = 'py-3 flex justify-between items-center';
+        li.setAttribute(attribute, value);
+        li.innerHTML = html;
+        return li;
+    }
+
+    function escape(text) {
+        var span = document.createElement('span');
+        span.textContent = text == null ? '' : String(text);
+        return span.innerHTML;
+    }
+
+    function onStock(data) {
+        document.querySelectorAll('[data-product-id="' + data.product_id + '"]').forEach(function (row) {
+            row.querySelectorAll('[data-stock-quantity]').forEach(function (cell) {
+                cell.textContent = cell.dataset.stockQuantity === 'left' ? data.quantity + ' left' : data.quantity;
+            });
+            if (row.tagName === 'TR') {
+                row.classList.toggle('bg-amber-50', data.is_low_stock);
+            }
+        });
+
+        var list = document.querySelector('[data-low-stock-list]');
+        if (!list) {
+            return;
+        }
+        var existing = list.querySelector('[data-product-id="' + data.product_id + '"]');
+        if (existing && !data.is_low_stock) {
+            existing.remove();
+        } else if (!existing && data.is_low_stock) {
+            list.prepend(item(
+                '<div><p class="font-medium text-slate-800">' + escape(data.name) + '</p>' +
+                '<p class="text-sm text-slate-500">SKU: ' + escape(data.sku) + '</p></div>' +
+                '<span class="text-amber-600 font-semibold" data-stock-quantity="left">' + data.quantity + ' left</span>',
+                'data-product-id', data.product_id
+            ));
+        }
+        trim(list);
+    }
+
+    function onSale(data) {
+        var revenue = document.querySelector('[data-revenue]');
+        if (revenue) {
+            var total = parseFloat(revenue.dataset.revenue) + data.quantity * parseFloat(data.unit_price);
+            revenue.dataset.revenue = total;
+            revenue.textContent = '$' + total.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2});
+        }
+        var list = document.querySelector('[data-recent-sales]');
+        if (!list || list.querySelector('[data-sale-id="' + data.id + '"]')) {
+            return;
+        }
+        var li = item(
+            '<div><p class="font-medium text-slate-800">' + escape(data.product_name || 'Product #' + data.product_id) + '</p>' +
+            '<p class="text-sm text-slate-500">' + data.quantity + ' pcs · $' + escape(data.unit_price) + '</p></div>',
+            'data-sale-id', data.id
+        );
+        li.className = 'py-3';
+        list.prepend(li);
+        trim(list);
+    }
+
+    var source = new EventSource(root.dataset.liveStock);
+    source.addEventListener('stock', function (event) {
+        onStock(JSON.parse(event.data));
+    });
+    source.addEventListener('sale', function (event) {
+        onSale(JSON.parse(event.data));
+    });
+})();
@@ -0,0 +1,13 @@
+/** @type {import('tailwindcss').Config} */
+module.exports = {
+  content: [
+    './templates/**/*.html',
+    './static/js/**/*.js',
+    './*/forms.py',
+    './*/views.py',
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};